@@ -1,21 +1,273 @@
 from puzzle import Puzzle
-import copy
+from bisect import bisect_right
+
+# translation tables turning a row of markers into a binary string of pegs,
+# or of unused cells
+_PEG_BITS = str.maketrans({"*": "1", ".": "0", "#": "0"})
+_UNUSED_BITS = str.maketrans({"*": "0", ".": "0", "#": "1"})
+# _Board shared by every GridPegSolitairePuzzle on the same grid shape
+_BOARDS = {}
+
+
+class _Board:
+    """
+    The shape of a peg solitaire grid, and every jump that can be made on
+    it.  The pegs on a grid are held as an int with one bit per cell, the
+    first cell in the highest bit.
+    """
+
+    def __init__(self, n, m, unused):
+        """
+        Create a new _Board self for grids of n rows of m cells, with the
+        cells set in unused never holding a peg.
+
+        @type self: _Board
+        @type n: int
+        @type m: int
+        @type unused: int
+        @rtype: None
+        """
+        self.n, self.m, self.unused = n, m, unused
+        size = n * m
+        # bits[i] is the bit for cell i, counting row by row
+        self.bits = [1 << (size - 1 - i) for i in range(size)]
+        # each pagoda is (weights, values, finals): no jump raises the total
+        # weights[i] of the cells i holding pegs, so a last peg can only
+        # stand where its weight is at most the total now; values are the
+        # weights sorted, and finals[k] the cells with the k least weights
+        self.pagodas = []
+        for weights in self._pagodas():
+            order = sorted([i for i in range(size)
+                            if not self.bits[i] & unused],
+                           key=weights.__getitem__)
+            finals = [0]
+            for i in order:
+                finals.append(finals[-1] | self.bits[i])
+            self.pagodas.append(
+                (weights, [weights[i] for i in order], finals))
+        # for rows and then columns, how far apart the bits of neighbouring
+        # cells are, and the cells starting a run of three cells in use
+        self.lines = [(1, sum([self.bits[i] for i in range(size)
+                               if i % m < m - 2 and
+                               not (self.bits[i] | self.bits[i + 1] |
+                                    self.bits[i + 2]) & unused])),
+                      (m, sum([self.bits[i] for i in range(size - 2 * m)
+                               if not (self.bits[i] | self.bits[i + m] |
+                                       self.bits[i + 2 * m]) & unused]))]
+        # each jump is (pegs, cells, changes): it can be made when, of
+        # cells (the from, over and to cells), exactly pegs (the from and
+        # over cells) hold pegs; it toggles every one of cells, and changes
+        # the total of each pagoda by its entry in changes
+        self.jumps = []
+        for to in range(size):
+            r, c = divmod(to, m)
+            # jumping down, up, left and right into the cell at to
+            for dr, dc in ((-1, 0), (1, 0), (0, 1), (0, -1)):
+                if 0 <= r + 2 * dr < n and 0 <= c + 2 * dc < m:
+                    start, over = to + 2 * (dr * m + dc), to + dr * m + dc
+                    pegs = self.bits[start] | self.bits[over]
+                    cells = pegs | self.bits[to]
+                    if not cells & unused:
+                        changes = tuple([w[to] - w[start] - w[over]
+                                         for w, _, _ in self.pagodas])
+                        self.jumps.append((pegs, cells, changes))
+        # the symmetries of the grid that keep its unused cells unused,
+        # other than leaving it be, each as one table per byte of pegs
+        # (lowest byte first) giving the bits those pegs map to
+        self.symmetries = []
+        for image in self._images():
+            tables = [[0] * 256 for _ in range(0, size, 8)]
+            for i, j in enumerate(image):
+                k, bit = divmod(size - 1 - i, 8)
+                for byte in range(256):
+                    if byte >> bit & 1:
+                        tables[k][byte] |= self.bits[j]
+            if self._mapped(unused, tables) == unused:
+                self.symmetries.append(tables)
+
+    def __reduce__(self):
+        # Return how to pickle or copy _Board self: as the shared _Board of
+        # its shape, so copied puzzles keep comparing equal to the puzzles
+        # they were copied from.
+        #
+        # @type self: _Board
+        # @rtype: tuple
+        return _board, (self.n, self.m, self.unused)
+
+    def _pagodas(self):
+        # Return pagoda functions for _Board self, one for each cell in use
+        # nearest a corner: the weight of a cell d steps from that cell
+        # is fib(D - d + 1), where D is the furthest any cell in use is
+        # from it, so that a jump towards it at most breaks even.
+        #
+        # @type self: _Board
+        # @rtype: list[list[int]]
+        n, m = self.n, self.m
+        used = [divmod(i, m) for i in range(n * m)
+                if not self.bits[i] & self.unused]
+        anchors = []
+        for corner in ((0, 0), (0, m - 1), (n - 1, 0), (n - 1, m - 1)):
+            anchor = min(used, key=lambda place: (
+                abs(place[0] - corner[0]) + abs(place[1] - corner[1]), place),
+                default=None)
+            if anchor is not None and anchor not in anchors:
+                anchors.append(anchor)
+        pagodas = []
+        for ar, ac in anchors:
+            steps = [abs(r - ar) + abs(c - ac)
+                     for r, c in [divmod(i, m) for i in range(n * m)]]
+            furthest = max([abs(r - ar) + abs(c - ac) for r, c in used])
+            fib = [0, 1]
+            while len(fib) < furthest + 2:
+                fib.append(fib[-1] + fib[-2])
+            # unused cells never hold pegs, so their weight never counts
+            pagodas.append([fib[max(furthest - d + 1, 0)] for d in steps])
+        return pagodas
+
+    def stranded(self, pegs):
+        """
+        Return the number of pegs that can never jump or be jumped, however
+        the rest move.
+
+        A hole can only fill if the two cells beyond it in a line can
+        both hold pegs, so the cells that can ever hold pegs are found by
+        growing pegs that way; only runs of three of those cells can ever
+        see a jump.
+
+        @type self: _Board
+        @type pegs: int
+        @rtype: int
+
+        >>> _board(1, 5, 0).stranded(0b10001)
+        2
+        >>> _board(1, 5, 0).stranded(0b10011)
+        0
+        """
+        reach = pegs
+        while True:
+            grown = reach
+            for step, starts in self.lines:
+                # fill the first cell of a run from the other two, or the
+                # last from the first two
+                grown |= reach << step & reach << 2 * step & starts
+                grown |= (reach >> step & reach >> 2 * step &
+                          starts >> 2 * step)
+            if grown == reach:
+                break
+            reach = grown
+        live = 0
+        for step, starts in self.lines:
+            runs = reach & reach << step & reach << 2 * step & starts
+            live |= runs | runs >> step | runs >> 2 * step
+        return bin(pegs & ~live).count("1")
+
+    def _images(self):
+        # Return, for each reflection or rotation of _Board self onto its
+        # own shape other than leaving it be, the cell each cell maps to.
+        #
+        # @type self: _Board
+        # @rtype: list[list[int]]
+        n, m = self.n, self.m
+        places = [divmod(i, m) for i in range(n * m)]
+        moves = [lambda r, c: (r, m - 1 - c),
+                 lambda r, c: (n - 1 - r, c),
+                 lambda r, c: (n - 1 - r, m - 1 - c)]
+        if n == m:
+            # square grids can also be turned a quarter or reflected
+            # across a diagonal
+            moves += [lambda r, c: (c, r),
+                      lambda r, c: (n - 1 - c, n - 1 - r),
+                      lambda r, c: (c, n - 1 - r),
+                      lambda r, c: (n - 1 - c, r)]
+        return [[r * m + c for r, c in [move(*place) for place in places]]
+                for move in moves]
+
+    @staticmethod
+    def _mapped(pegs, tables):
+        # Return pegs moved by the symmetry with tables.
+        #
+        # @type pegs: int
+        # @type tables: list[list[int]]
+        # @rtype: int
+        image = 0
+        for table in tables:
+            image |= table[pegs & 255]
+            pegs >>= 8
+        return image
+
+    def canonical(self, pegs):
+        """
+        Return the least of pegs and its images under the symmetries of
+        _Board self, which is the same for pegs and all of its images.
+
+        @type self: _Board
+        @type pegs: int
+        @rtype: int
+
+        >>> board = _board(1, 3, 0)
+        >>> board.canonical(0b110), board.canonical(0b011)
+        (3, 3)
+        """
+        best = pegs
+        for tables in self.symmetries:
+            image = self._mapped(pegs, tables)
+            if image < best:
+                best = image
+        return best
+
+    def marker(self, pegs):
+        """
+        Return the grid of markers for pegs on _Board self.
+
+        @type self: _Board
+        @type pegs: int
+        @rtype: list[list[str]]
+        """
+        row = ["#" if bit & self.unused else "*" if bit & pegs else "."
+               for bit in self.bits]
+        return [row[i:i + self.m] for i in range(0, len(row), self.m)]
+
+
+def _board(n, m, unused):
+    """
+    Return the _Board for grids of n rows of m cells with unused cells
+    unused, shared by every GridPegSolitairePuzzle on such a grid.
+
+    @type n: int
+    @type m: int
+    @type unused: int
+    @rtype: _Board
+    """
+    if (n, m, unused) not in _BOARDS:
+        _BOARDS[(n, m, unused)] = _Board(n, m, unused)
+    return _BOARDS[(n, m, unused)]
+
 
 class GridPegSolitairePuzzle(Puzzle):
     """
     Snapshot of peg solitaire on a rectangular grid. May be solved,
     unsolved, or even unsolvable.
+
+    The pegs are held as bits of an int, and each jump toggles three of
+    them; the grid of markers is only built when asked for.
     """
 
-    def __init__(self, marker, marker_set):
+    def __init__(self, marker, marker_set, symmetric=False):
         """
         Create a new GridPegSolitairePuzzle self with
         marker indicating pegs, spaces, and unused
         and marker_set indicating allowed markers.
 
+        When symmetric is True, the state key of a grid is shared by its
+        reflections and rotations that keep "#" cells in place, so solvers
+        explore only one of them.  A TranspositionTable keys them by their
+        exact_key, the pegs themselves, so it never hands back the
+        extensions of another image.
+
         @type marker: list[list[str]]
         @type marker_set: set[str]
                           "#" for unused, "*" for peg, "." for empty
+        @type symmetric: bool
         """
         assert isinstance(marker, list)
         assert len(marker) > 0
@@ -23,6 +275,51 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([all(x in marker_set for x in row) for row in marker]) # checks whether every item in each row is a possible marker
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])  # checks whether each marker in marker_set is one of: #, *, .
         self._marker, self._marker_set = marker, marker_set
+        cells = "".join(["".join(row) for row in marker])
+        self._board = _board(len(marker), len(marker[0]),
+                             int(cells.translate(_UNUSED_BITS) or "0", 2))
+        self._pegs = int(cells.translate(_PEG_BITS) or "0", 2)
+        self._symmetric = symmetric
+        # the total weight of the pegs under each pagoda of the board
+        self._pagoda = tuple([sum([w for w, bit in zip(weights,
+                                                       self._board.bits)
+                                   if bit & self._pegs])
+                              for weights, _, _ in self._board.pagodas])
+
+    @property
+    def marker(self):
+        """
+        The grid of markers of GridPegSolitairePuzzle self, built from its
+        pegs the first time it is needed.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: list[list[str]]
+
+        >>> grid = [["*", "*", "."], ["#", "*", "*"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).extensions()[0]\
+.marker
+        [['.', '.', '*'], ['#', '*', '*']]
+        """
+        if self._marker is None:
+            self._marker = self._board.marker(self._pegs)
+        return self._marker
+
+    def _jumped(self, cells, changes):
+        # Return a new GridPegSolitairePuzzle on the same board as
+        # GridPegSolitairePuzzle self, after the jump toggling cells and
+        # changing the pagoda totals by changes.
+        #
+        # @type self: GridPegSolitairePuzzle
+        # @type cells: int
+        # @type changes: tuple[int]
+        # @rtype: GridPegSolitairePuzzle
+        move = type(self).__new__(type(self))
+        move._board, move._marker_set = self._board, self._marker_set
+        move._pegs, move._marker = self._pegs ^ cells, None
+        move._symmetric = self._symmetric
+        move._pagoda = tuple([total + change for total, change
+                              in zip(self._pagoda, changes)])
+        return move
 
     def __eq__(self, other):
         """
@@ -53,9 +350,12 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> p2 = GridPegSolitairePuzzle(grid2, m)
         >>> p == p2
         False
+        >>> import copy, pickle
+        >>> pickle.loads(pickle.dumps(p)) == p, copy.deepcopy(p) == p
+        (True, True)
         """
-        return (self._marker_set == other._marker_set) and \
-               (self._marker == other._marker)
+        return (self._marker_set == other._marker_set and
+                self._board is other._board and self._pegs == other._pegs)
 
     def __str__(self):
         """
@@ -91,7 +391,7 @@ class GridPegSolitairePuzzle(Puzzle):
         # # * # # |
         """
         s = ''
-        for row in self._marker:
+        for row in self.marker:
             for x in row:
                 s += x + ' '
             # add | to indicate end of row
@@ -118,7 +418,7 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> g2
         GridPegSolitairePuzzle([['#', '#', '*', '#', '#']])
         """
-        return "GridPegSolitairePuzzle({})".format(self._marker)
+        return "GridPegSolitairePuzzle({})".format(self.marker)
 
 
     def extensions(self):
@@ -137,7 +437,7 @@ class GridPegSolitairePuzzle(Puzzle):
             ["*", "*", "*", "*", "*"]]
         >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
         >>> gpsp.extensions()
-        [GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '.'], ['*', '*', '.', '.', '*'], ['*', '*', '*', '.', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '.', '.', '*', '.'], ['*', '*', '.', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '.'], ['*', '*', '.', '.', '*'], ['*', '*', '*', '.', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '.', '.', '*', '.'], ['*', '*', '.', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '.', '*', '*'], ['*', '*', '.', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '.', '*', '*'], ['*', '*', '.', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['.', '.', '*', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']])]
+        [GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '.'], ['*', '*', '.', '.', '*'], ['*', '*', '*', '.', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '.', '.', '*', '.'], ['*', '*', '.', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '*'], ['*', '*', '.', '*', '.'], ['*', '*', '*', '*', '.'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '.', '*', '*'], ['*', '*', '.', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '.', '*', '*'], ['*', '*', '.', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '.', '.'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']]), GridPegSolitairePuzzle([['*', '*', '*', '*', '*'], ['*', '*', '*', '.', '.'], ['.', '.', '*', '*', '*'], ['*', '*', '*', '*', '*'], ['*', '*', '*', '*', '*']])]
         >>> grid2 = [["*"], ["*"], ['.'], ["*"], ["*"]]
         >>> gpsp2 = GridPegSolitairePuzzle(grid2, {"*", ".", "#"})
         >>> gpsp2.extensions()
@@ -147,55 +447,10 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> gpsp3.extensions()
         [GridPegSolitairePuzzle([['*'], ['.'], ['.']])]
         """
-        # for simplification
-        grid = self._marker
-
-        possible_move, has_empty_, r_index, c_index = [], None, 0, 0
-        # find index: (c_index, r_index)
-        for row in grid:
-             for i in row:
-                 if i == ".":
-                     # has_empty_ = True
-                     c_index = row.index(i)
-                     r_index = grid.index(row)
-
-                     #vertical down move
-                     if r_index >= 2 and grid[r_index -1][c_index] == "*" and grid[r_index - 2][c_index] == "*":
-                         up_temp = copy.deepcopy(grid)
-                         up_temp[r_index - 1][c_index] = "."
-                         up_temp[r_index - 2][c_index] = "."
-                         up_temp[r_index][c_index] = "*"
-                         possible_move.append(up_temp)
-
-                     # vertical up move
-                     if r_index + 3 <= len(grid) and grid[r_index + 2][c_index] == "*" and grid[r_index + 1][c_index] == "*":
-                         down_temp = copy.deepcopy(grid)
-                         down_temp[r_index + 1][c_index] = "."
-                         down_temp[r_index + 2][c_index] = "."
-                         down_temp[r_index][c_index] = "*"
-                         possible_move.append(down_temp)
-
-                     # horizontal left move
-                     if c_index + 3 <= len(grid[0]) and grid[r_index][c_index + 2] == "*" and grid[r_index][c_index + 1] == "*":
-                         left_temp = copy.deepcopy(grid)
-                         left_temp[r_index][c_index + 2] = "."
-                         left_temp[r_index][c_index + 1] = "."
-                         left_temp[r_index][c_index] = "*"
-                         possible_move.append(left_temp)
-
-                     # horizontal right move
-                     if c_index >= 2 and grid[r_index][c_index - 2] == "*" and grid[r_index][c_index - 1] == "*":
-                         right_temp = copy.deepcopy(grid)
-                         right_temp[r_index][c_index - 2] = "."
-                         right_temp[r_index][c_index - 1] = "."
-                         right_temp[r_index][c_index] = "*"
-                         possible_move.append(right_temp)
-
-        final = []
-        for move in possible_move:
-            final.append((GridPegSolitairePuzzle(move, self._marker_set)))
-        return final
-
+        pegs = self._pegs
+        return [self._jumped(cells, changes)
+                for need, cells, changes in self._board.jumps
+                if pegs & cells == need]
 
     def is_solved(self):
         """
@@ -216,14 +471,94 @@ class GridPegSolitairePuzzle(Puzzle):
         True
         """
 
-        count = 0
+        # exactly one bit is set
+        return self._pegs != 0 and self._pegs & (self._pegs - 1) == 0
 
-        for row in self._marker:
-            for pos in row:
-                if pos == "*":
-                    count += 1
+    def fail_fast(self):
+        """
+        Return True if GridPegSolitairePuzzle self can never be reduced to
+        a single peg: when no cell is left where each pagoda function allows
+        the last peg to stand, or when two pegs can never jump or be
+        jumped.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+
+        >>> GridPegSolitairePuzzle([["*", ".", "*"]], {"*", "."}).fail_fast()
+        True
+        >>> grid = [["*", "*", ".", "."]]
+        >>> GridPegSolitairePuzzle(grid, {"*", "."}).fail_fast()
+        False
+        """
+        board, pegs = self._board, self._pegs
+        if not pegs:
+            return True
+        finals = ~board.unused
+        for (_, values, cells), total in zip(board.pagodas, self._pagoda):
+            finals &= cells[bisect_right(values, total)]
+        return not finals or board.stranded(pegs) > 1
+
+    def heuristic(self):
+        """
+        Return the number of jumps left before a single peg remains.  Each
+        jump removes exactly one peg, so this is exact whenever a solution
+        exists.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
 
-        return count == 1
+        >>> grid = [["*", "*", "."], ["*", ".", "#"]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).heuristic()
+        2
+        """
+        return max(bin(self._pegs).count("1") - 1, 0)
+
+    def state_key(self):
+        """
+        Return a hashable key identifying the configuration of
+        GridPegSolitairePuzzle self: its pegs, an int with one bit per cell,
+        set where the cell holds a peg.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid = [["*", ".", "*"], ["#", "*", "."]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).state_key()
+        42
+        >>> left = [["*", "*", "."], [".", ".", "."]]
+        >>> right = [[".", "*", "*"], [".", ".", "."]]
+        >>> [GridPegSolitairePuzzle(g, {"*", "."}, True).state_key()
+        ...  for g in [left, right]]
+        [3, 3]
+        """
+        # the layout of "#" cells never changes during a search, so only
+        # pegs need to be recorded
+        if self._symmetric:
+            return self._board.canonical(self._pegs)
+        return self._pegs
+
+    def exact_key(self):
+        """
+        Return a hashable key identifying the configuration of
+        GridPegSolitairePuzzle self exactly: its pegs, even when its
+        state_key is shared with its reflections and rotations.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> right = [[".", "*", "*"], [".", ".", "."]]
+        >>> GridPegSolitairePuzzle(right, {"*", "."}, True).exact_key()
+        24
+        """
+        return self._pegs
 
 
 
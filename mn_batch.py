@@ -0,0 +1,305 @@
+"""
+Batched search for MNPuzzles working towards the same to_grid: states are
+rows of a numpy uint8 array, one column per cell, holding the codes of
+MNPuzzle.state_key, and heuristics, keys and moves are worked out for
+thousands of rows at a time.
+"""
+from mn_puzzle import MNPuzzle
+from puzzle_tools import chain
+import numpy as np
+
+
+class Batch:
+    """
+    The codes, goal and lookup tables shared by batches of states of
+    MNPuzzles working towards one to_grid.
+    """
+
+    def __init__(self, to_grid, databases=None):
+        """
+        Create a new Batch self for MNPuzzles working towards to_grid,
+        estimating distances with databases, PatternDatabases for disjoint
+        patterns of to_grid, as well as Manhattan distance.
+
+        @type self: Batch
+        @type to_grid: tuple[tuple[str]]
+        @type databases: list[PatternDatabase] | None
+        @rtype: None
+        """
+        self.n, self.m = len(to_grid), len(to_grid[0])
+        self.to_grid = tuple([tuple(row) for row in to_grid])
+        self.goal = MNPuzzle(self.to_grid, self.to_grid)
+        cells = self.n * self.m
+        # codes[symbol] is the code state_key gives symbol
+        goal_key = self.goal.state_key()
+        symbols = [x for row in self.to_grid for x in row]
+        self.codes = dict(zip(symbols, goal_key))
+        self.symbols = {code: x for x, code in self.codes.items()}
+        self.blank = self.codes["*"]
+        # distance[code, cell] is the Manhattan distance of cell from the
+        # nearest place the tile with that code belongs
+        self.distance = np.zeros((256, cells), dtype=np.int32)
+        rows, cols = np.divmod(np.arange(cells), self.m)
+        for code in set(goal_key) - {self.blank}:
+            places = [i for i, c in enumerate(goal_key) if c == code]
+            self.distance[code] = np.min(
+                [abs(rows - i // self.m) + abs(cols - i % self.m)
+                 for i in places], axis=0)
+        self.databases = []
+        for db in databases or []:
+            if db.to_grid != self.to_grid:
+                raise ValueError("pattern databases must share a to_grid")
+            self.databases.append(
+                ([self.codes[x] for x in db.pattern],
+                 np.frombuffer(db.table, dtype=np.uint8)))
+        # keys pack each code into bits bits when the whole row fits in a
+        # 64-bit integer
+        self.bits = max(1, (max(goal_key)).bit_length())
+        self.shifts = None
+        if self.bits * cells <= 64:
+            self.shifts = (np.arange(cells, dtype=np.uint64) *
+                           np.uint64(self.bits))
+        self.goal_key = self.keys(self.pack([self.goal]))[0]
+
+    def pack(self, puzzles):
+        """
+        Return the states of puzzles as the rows of an array.
+
+        @type self: Batch
+        @type puzzles: list[MNPuzzle]
+        @rtype: numpy.ndarray
+        """
+        for puz in puzzles:
+            if puz.to_grid != self.to_grid or (puz.n, puz.m) != (self.n,
+                                                                 self.m):
+                raise ValueError("puzzle works towards a different to_grid")
+        return np.frombuffer(b"".join([puz.state_key() for puz in puzzles]),
+                             dtype=np.uint8).reshape(len(puzzles), -1)
+
+    def unpack(self, state):
+        """
+        Return the MNPuzzle in a row state of a batch.
+
+        @type self: Batch
+        @type state: numpy.ndarray
+        @rtype: MNPuzzle
+        """
+        row = [self.symbols[code] for code in state.tolist()]
+        return MNPuzzle(tuple([tuple(row[i:i + self.m])
+                               for i in range(0, len(row), self.m)]),
+                        self.to_grid)
+
+    def heuristic(self, states):
+        """
+        Return, for each row of states, the larger of its Manhattan
+        distance and the sum of its pattern database distances.
+
+        @type self: Batch
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> batch = Batch(target_grid)
+        >>> states = batch.pack([MNPuzzle(target_grid, target_grid),
+        ...                      MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+        ...                               target_grid)])
+        >>> batch.heuristic(states).tolist()
+        [0, 3]
+        """
+        cells = states.shape[1]
+        total = self.distance[states, np.arange(cells)].sum(axis=1)
+        if self.databases:
+            pattern = np.zeros(len(states), dtype=np.int32)
+            for codes, table in self.databases:
+                pattern += table[self._ranks(states, codes)]
+            total = np.maximum(total, pattern)
+        return total
+
+    def _ranks(self, states, codes):
+        # Return the index in a pattern database table of the places of
+        # the tiles with codes in each row of states, as mn_puzzle._rank
+        # works it out for one row.
+        #
+        # @type self: Batch
+        # @type states: numpy.ndarray
+        # @type codes: list[int]
+        # @rtype: numpy.ndarray
+        cells = states.shape[1]
+        positions = [np.argmax(states == code, axis=1) for code in codes]
+        rank = np.zeros(len(states), dtype=np.int64)
+        for i, p in enumerate(positions):
+            taken = sum([(q < p) for q in positions[:i]], np.zeros_like(p))
+            rank = rank * (cells - i) + p - taken
+        return rank
+
+    def keys(self, states):
+        """
+        Return a key for each row of states, equal only for equal rows:
+        the codes packed into an integer when they fit, or else the row's
+        bytes.
+
+        @type self: Batch
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> batch = Batch(target_grid)
+        >>> puz = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), target_grid)
+        >>> keys = batch.keys(batch.pack([puz, puz.extensions()[0], puz]))
+        >>> bool(keys[0] == keys[2]), bool(keys[0] == keys[1])
+        (True, False)
+        """
+        if self.shifts is not None:
+            return np.bitwise_or.reduce(
+                states.astype(np.uint64) << self.shifts, axis=1)
+        rows = np.ascontiguousarray(states)
+        return rows.view(np.dtype((np.void, rows.shape[1]))).ravel()
+
+    def expand(self, states):
+        """
+        Return the rows reached by sliding a tile into the blank of each
+        row of states, with the index in states of the row each came from.
+
+        @type self: Batch
+        @type states: numpy.ndarray
+        @rtype: (numpy.ndarray, numpy.ndarray)
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> batch = Batch(target_grid)
+        >>> puz = MNPuzzle((("*", "2", "3"), ("1", "4", "5")), target_grid)
+        >>> children, parents = batch.expand(batch.pack([puz]))
+        >>> for row in children:
+        ...     print(batch.unpack(row).from_grid)
+        (('1', '2', '3'), ('*', '4', '5'))
+        (('2', '*', '3'), ('1', '4', '5'))
+        >>> parents.tolist()
+        [0, 0]
+        """
+        blanks = np.argmax(states == self.blank, axis=1)
+        rows, cols = np.divmod(blanks, self.m)
+        children, parents = [], []
+        for shift, valid in ((-self.m, rows > 0),
+                             (self.m, rows < self.n - 1),
+                             (-1, cols > 0),
+                             (1, cols < self.m - 1)):
+            index = np.nonzero(valid)[0]
+            moved = states[index].copy()
+            blank, target = blanks[index], blanks[index] + shift
+            lines = np.arange(len(index))
+            moved[lines, blank] = moved[lines, target]
+            moved[lines, target] = self.blank
+            children.append(moved)
+            parents.append(index)
+        return np.concatenate(children), np.concatenate(parents)
+
+
+def batch_astar_solve(puzzle, databases=None, batch=4096):
+    """
+    Return a cheapest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution of MNPuzzle puzzle, as astar_solve does, or None
+    if there is none.
+
+    Rather than one MNPuzzle at a time, up to batch states with the
+    lowest estimate are taken at once, expanded, keyed and estimated as
+    arrays.  Only the states on the path returned become MNPuzzles.
+
+    @param MNPuzzle puzzle: MNPuzzle to solve
+    @param list[PatternDatabase]|None databases: disjoint pattern databases
+        for the to_grid of puzzle, added to estimate the moves left
+    @param int batch: most states expanded together
+    @rtype: PuzzleNode | None
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> node = batch_astar_solve(MNPuzzle(start_grid, target_grid))
+    >>> while node.children:
+    ...     node = node.children[0]
+    ...     print(node.puzzle.from_grid)
+    (('1', '2', '3'), ('*', '4', '5'))
+    (('1', '2', '3'), ('4', '*', '5'))
+    (('1', '2', '3'), ('4', '5', '*'))
+    """
+    if puzzle.fail_fast():
+        return None
+    tables = Batch(puzzle.to_grid, databases)
+    root = tables.pack([puzzle])
+    # every state generated, with the index of its parent and the moves to
+    # it, in arrays grown by doubling; the first size rows are in use
+    states = np.empty((1024, root.shape[1]), dtype=np.uint8)
+    parents = np.empty(1024, dtype=np.int64)
+    costs = np.empty(1024, dtype=np.int64)
+    states[0], parents[0], costs[0], size = root[0], -1, 0, 1
+    # the keys of every state generated, sorted, with the fewest moves
+    # found to each
+    seen, best = tables.keys(root), np.zeros(1, dtype=np.int64)
+    # frontier[f] holds index arrays of states whose moves plus estimate
+    # is f
+    frontier = {int(tables.heuristic(root)[0]): [np.array([0])]}
+    while frontier:
+        # take the states queued last first, as they have come furthest
+        f = min(frontier)
+        index = np.concatenate(frontier.pop(f)[::-1])
+        if len(index) > batch:
+            frontier[f] = [index[batch:]]
+            index = index[:batch]
+        taken, g = states[index], costs[index]
+        keys = tables.keys(taken)
+        # a state reached again in fewer moves since it was queued is stale
+        fresh = best[np.searchsorted(seen, keys)] == g
+        index, taken, g = index[fresh], taken[fresh], g[fresh]
+        solved = np.nonzero(keys[fresh] == tables.goal_key)[0]
+        if len(solved):
+            return _path(tables, states, parents, index[solved[0]])
+        children, origin = tables.expand(taken)
+        moves = g[origin] + 1
+        # keep the first of each state in the batch, in order of moves
+        order = np.argsort(moves, kind="stable")
+        child_keys, first = np.unique(tables.keys(children)[order],
+                                      return_index=True)
+        keep = order[first]
+        moves = moves[keep]
+        # and of those, the states not seen before or now reached in fewer
+        # moves
+        places = np.searchsorted(seen, child_keys)
+        known = places < len(seen)
+        known[known] = seen[places[known]] == child_keys[known]
+        better = known.copy()
+        better[known] = best[places[known]] > moves[known]
+        best[places[better]] = moves[better]
+        new = ~known
+        seen = np.insert(seen, places[new], child_keys[new])
+        best = np.insert(best, places[new], moves[new])
+        keep, moves = keep[better | new], moves[better | new]
+        if not len(keep):
+            continue
+        children = children[keep]
+        estimates = moves + tables.heuristic(children)
+        while size + len(children) > len(states):
+            states = np.concatenate([states, np.empty_like(states)])
+            parents = np.concatenate([parents, np.empty_like(parents)])
+            costs = np.concatenate([costs, np.empty_like(costs)])
+        ids = np.arange(size, size + len(children))
+        states[ids], parents[ids], costs[ids] = (children,
+                                                 index[origin[keep]], moves)
+        size += len(children)
+        for value in np.unique(estimates).tolist():
+            frontier.setdefault(value, []).append(ids[estimates == value])
+    return None
+
+
+def _path(tables, states, parents, index):
+    """
+    Return the path of PuzzleNodes from the first state to the state at
+    index, following parents.
+
+    @param Batch tables: the Batch the states belong to
+    @param numpy.ndarray states: every state generated
+    @param numpy.ndarray parents: the index of each state's parent, or -1
+    @param int index: the index of the last state on the path
+    @rtype: PuzzleNode
+    """
+    path = []
+    while index >= 0:
+        path.append(tables.unpack(states[index]))
+        index = parents[index]
+    return chain(path[::-1])
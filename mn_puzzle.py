@@ -1,10 +1,174 @@
 from puzzle import Puzzle
-from copy import deepcopy
+from array import array
+from bisect import bisect_left
+import json
+import mmap
+
+# _Layout shared by every MNPuzzle working towards the same to_grid
+_LAYOUTS = {}
+# moves for each board shape (n, m), shared by every MNPuzzle of that shape
+_MOVES = {}
+
+
+class _Layout:
+    """
+    How the MNPuzzles working towards one to_grid are packed: each symbol
+    has a one-byte code, and a grid is packed into a bytes object holding
+    the codes of its symbols row by row.
+    """
+
+    def __init__(self, to_grid):
+        """
+        Create a new _Layout self for the MNPuzzles working towards to_grid.
+
+        @type self: _Layout
+        @type to_grid: tuple[tuple[str]]
+        @rtype: None
+        """
+        # symbols[code] is the symbol with that code
+        self.symbols = sorted(set([x for row in to_grid for x in row]))
+        self.codes = {x: i for i, x in enumerate(self.symbols)}
+        self.goal = self.pack(to_grid)
+        self.width, self.blank = len(to_grid[0]), self.code("*")
+        # goal_row[code], goal_col[code] is where the tile with that code
+        # belongs, or -1 for the blank and symbols not in to_grid; only
+        # kept when each tile belongs in a single place
+        self.goal_row = self.goal_col = None
+        if len(set(self.goal)) == len(self.goal):
+            self.goal_row, self.goal_col = [-1] * 256, [-1] * 256
+            for i, code in enumerate(self.goal):
+                if code != self.blank:
+                    self.goal_row[code], self.goal_col[code] = divmod(
+                        i, self.width)
+
+    def code(self, symbol):
+        """
+        Return the code for symbol, giving it a new one if it has none.
+
+        @type self: _Layout
+        @type symbol: str
+        @rtype: int
+        """
+        if symbol not in self.codes:
+            if len(self.symbols) == 256:
+                raise ValueError("an MNPuzzle has at most 256 symbols")
+            self.codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.codes[symbol]
+
+    def pack(self, grid):
+        """
+        Return grid packed one byte per cell, row by row.
+
+        @type self: _Layout
+        @type grid: tuple[tuple[str]]
+        @rtype: bytes
+        """
+        return bytes([self.code(x) for row in grid for x in row])
+
+    def row_conflict(self, cells, r, m):
+        """
+        Return the linear conflict of row r of cells, m cells wide: twice
+        the fewest tiles that belong in row r that must leave it so that
+        the rest are in the order they belong in.
+
+        @type self: _Layout
+        @type cells: bytes
+        @type r: int
+        @type m: int
+        @rtype: int
+        """
+        goal_row, goal_col = self.goal_row, self.goal_col
+        order = [goal_col[code] for code in cells[r * m:(r + 1) * m]
+                 if goal_row[code] == r]
+        return 2 * (len(order) - _longest_increasing(order))
+
+    def col_conflict(self, cells, c, m):
+        """
+        Return the linear conflict of column c of cells, m cells wide,
+        as for row_conflict.
+
+        @type self: _Layout
+        @type cells: bytes
+        @type c: int
+        @type m: int
+        @rtype: int
+        """
+        goal_row, goal_col = self.goal_row, self.goal_col
+        order = [goal_row[code] for code in cells[c::m]
+                 if goal_col[code] == c]
+        return 2 * (len(order) - _longest_increasing(order))
+
+
+def _longest_increasing(values):
+    """
+    Return the length of the longest increasing subsequence of values.
+
+    @type values: list[int]
+    @rtype: int
+
+    >>> _longest_increasing([2, 0, 1, 3])
+    3
+    """
+    # tails[k] is the smallest last value of an increasing run of k + 1
+    tails = []
+    for value in values:
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+        else:
+            tails[k] = value
+    return len(tails)
+
+
+def _layout(to_grid):
+    """
+    Return the _Layout for MNPuzzles working towards to_grid, shared by
+    all of them.
+
+    @type to_grid: tuple[tuple[str]]
+    @rtype: _Layout
+    """
+    if to_grid not in _LAYOUTS:
+        _LAYOUTS[to_grid] = _Layout(to_grid)
+    return _LAYOUTS[to_grid]
+
+
+def _moves(n, m):
+    """
+    Return, for each cell of an n by m board packed row by row, the cells
+    the blank there can swap with, each with whether the swap is vertical.
+
+    @type n: int
+    @type m: int
+    @rtype: list[tuple[tuple[int, bool]]]
+
+    >>> _moves(2, 3)[0]
+    ((3, True), (1, False))
+    >>> _moves(2, 3)[4]
+    ((1, True), (3, False), (5, False))
+    """
+    if (n, m) not in _MOVES:
+        table = []
+        for blank in range(n * m):
+            r, c = divmod(blank, m)
+            # up, down, left, right
+            table.append(tuple(
+                [(blank - m, True)] * (r > 0) +
+                [(blank + m, True)] * (r < n - 1) +
+                [(blank - 1, False)] * (c > 0) +
+                [(blank + 1, False)] * (c < m - 1)))
+        _MOVES[(n, m)] = table
+    return _MOVES[(n, m)]
+
 
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    The configuration is held packed, one byte per cell, and moves are
+    swaps of two bytes; from_grid is only built when asked for.
     """
 
     def __init__(self, from_grid, to_grid):
@@ -22,8 +186,37 @@ class MNPuzzle(Puzzle):
         assert len(from_grid) > 0
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
+        to_grid = tuple([tuple(row) for row in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        self.to_grid, self._layout = to_grid, _layout(to_grid)
+        self._from_grid = from_grid
+        self._cells = self._layout.pack(from_grid)
+        self._blank = self._cells.find(self._layout.code("*"))
+        # whether no moves reach to_grid, once fail_fast has worked it out
+        self._unsolvable = None
+        # the value of heuristic, once it has been worked out
+        self._h = None
+
+    @property
+    def from_grid(self):
+        """
+        The current configuration of MNPuzzle self, unpacked from its cells
+        the first time it is needed.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).extensions()[0].from_grid
+        (('1', '2', '3'), ('*', '4', '5'))
+        """
+        if self._from_grid is None:
+            symbols, m = self._layout.symbols, self.m
+            row = [symbols[code] for code in self._cells]
+            self._from_grid = tuple([tuple(row[i:i + m])
+                                     for i in range(0, len(row), m)])
+        return self._from_grid
 
     def __str__(self):
         """
@@ -67,8 +260,13 @@ class MNPuzzle(Puzzle):
         >>> mn == mn2
         False
         """
-        return (type(self) == type(other) and
-                self.m == other.m and
+        if type(self) != type(other):
+            return False
+        if self._layout is other._layout:
+            # same to_grid and codes, so the packed cells can be compared
+            return (self.m == other.m and self.n == other.n and
+                    self._cells == other._cells)
+        return (self.m == other.m and
                 self.n == other.n and
                 self.from_grid == other.from_grid and
                 self.to_grid == other.to_grid)
@@ -124,51 +322,130 @@ class MNPuzzle(Puzzle):
         [MNPuzzle((('*', '2', '1'), ('5', '4', '3')), (('1', '2', '3'), ('4', '5', '*'))), MNPuzzle((('5', '2', '1'), ('4', '*', '3')), (('1', '2', '3'), ('4', '5', '*')))]
 
         """
-        grid = deepcopy([list(x) for x in self.from_grid])
-        has_empty_, r_index, c_index = None, 0, 0
-        legal_moves = []
-
-        if self.from_grid == self.to_grid:
-            return legal_moves
-
-        #find empty spot
-        for row in grid:
-            for value in row:
-                if value == "*":
-                    r_index = grid.index(row)
-                    c_index = row.index(value)
-                    has_empty_ = True
-
-        if has_empty_:
-            if r_index - 1 >= 0:
-                #up move
-                up_grid = deepcopy(grid)
-                up_grid[r_index][c_index], up_grid[r_index - 1][c_index] = up_grid[r_index - 1][c_index], up_grid[r_index][c_index]
-                legal_moves.append(tuple(tuple(x) for x in up_grid))
-            if r_index + 1 < len(grid):
-                #down move
-                down_grid = deepcopy(grid)
-                down_grid[r_index][c_index], down_grid[r_index + 1][c_index] = down_grid[r_index + 1][c_index], down_grid[r_index][c_index]
-                legal_moves.append(tuple(tuple(x) for x in down_grid))
-            if c_index - 1 >= 0:
-                #left move
-                left_grid = deepcopy(grid)
-                left_grid[r_index][c_index], left_grid[r_index][c_index - 1] = left_grid[r_index][c_index - 1], left_grid[r_index][c_index]
-                legal_moves.append(tuple(tuple(x) for x in left_grid))
-            #if c_index + 1 <= len(grid[r_index]) >= 0:
-            if c_index + 1 <= len(grid[r_index])-1:
-                #right move
-                right_grid = deepcopy(grid)
-                right_grid[r_index][c_index], right_grid[r_index][c_index + 1] = right_grid[r_index][c_index + 1], right_grid[r_index][c_index]
-                legal_moves.append(tuple(tuple(x) for x in right_grid))
+        if self._cells == self._layout.goal:
+            return []
+        return self._slides()
+
+    def reverse_extensions(self):
+        """
+        Return list of the MNPuzzles that have MNPuzzle self among their
+        extensions.  Sliding a tile back undoes a move, so these are the
+        unsolved MNPuzzles one move away.
+
+        This is an overridden method of parent class Puzzle
+
+        @type self: MNPuzzle
+        @rtype: list[MNPuzzle]
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(target_grid, target_grid).reverse_extensions()
+        [MNPuzzle((('1', '2', '*'), ('4', '5', '3')), (('1', '2', '3'), \
+('4', '5', '*'))), MNPuzzle((('1', '2', '3'), ('4', '*', '5')), \
+(('1', '2', '3'), ('4', '5', '*')))]
+        """
+        return [move for move in self._slides() if not move.is_solved()]
+
+    def goal_state(self):
+        """
+        Return the solved MNPuzzle that MNPuzzle self is working towards.
+
+        This is an overridden method of parent class Puzzle
+
+        @type self: MNPuzzle
+        @rtype: MNPuzzle
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).goal_state().is_solved()
+        True
+        """
+        goal = self._moved(self._layout.goal,
+                           self._layout.goal.find(self._layout.code("*")))
+        goal._unsolvable = None
+        return goal
 
+    def _slides(self):
+        # Return list of MNPuzzles reached by sliding a tile of MNPuzzle
+        # self into the empty space, whether or not self is solved.
+        #
+        # @type self: MNPuzzle
+        # @rtype: list[MNPuzzle]
+        blank, cells = self._blank, self._cells
+        if blank < 0:
+            return []
+        # once the heuristic of self is known, each move updates it
+        tracked = self._h is not None and self._tracks_goal()
         final = []
-        for move in legal_moves:
-            final.append(MNPuzzle(move, self.to_grid))
+        for target, vertical in _moves(self.n, self.m)[blank]:
+            grid = bytearray(cells)
+            grid[blank], grid[target] = grid[target], grid[blank]
+            move = self._moved(bytes(grid), target)
+            if tracked:
+                move._h = self._h + self._change(move._cells, target,
+                                                 vertical)
+            final.append(move)
         return final
 
+    def _tracks_goal(self):
+        # Return whether the heuristic of MNPuzzle self can be tracked with
+        # its layout's goal table: each tile belongs in one place, and
+        # from_grid has the shape of to_grid.
+        #
+        # @type self: MNPuzzle
+        # @rtype: bool
+        layout = self._layout
+        return (layout.goal_row is not None and self.m == layout.width and
+                len(self._cells) == len(layout.goal))
+
+    def _change(self, cells, target, vertical):
+        # Return the change in heuristic when the tile at index target of
+        # MNPuzzle self slides into the blank, giving cells.  Only that
+        # tile's distance changes, and only the two rows (for a vertical
+        # move) or columns (for a horizontal one) it leaves and enters can
+        # change their linear conflict.  The distance is updated in O(1);
+        # the conflict of each of those lines is recomputed before and
+        # after the move, in O(m log m) for a line of m cells.
+        #
+        # @type self: MNPuzzle
+        # @type cells: bytes
+        # @type target: int
+        # @type vertical: bool
+        # @rtype: int
+        layout, m, before = self._layout, self.m, self._cells
+        code = before[target]
+        r0, c0 = divmod(target, m)
+        r1, c1 = divmod(self._blank, m)
+        gr, gc = layout.goal_row[code], layout.goal_col[code]
+        change = 0
+        if gr >= 0:
+            change = (abs(r1 - gr) + abs(c1 - gc) -
+                      abs(r0 - gr) - abs(c0 - gc))
+        if vertical:
+            for r in (r0, r1):
+                change += (layout.row_conflict(cells, r, m) -
+                           layout.row_conflict(before, r, m))
+        else:
+            for c in (c0, c1):
+                change += (layout.col_conflict(cells, c, m) -
+                           layout.col_conflict(before, c, m))
+        return change
 
-        #vertical move
+    def _moved(self, cells, blank):
+        # Return a new MNPuzzle working towards the same to_grid as MNPuzzle
+        # self, with packed configuration cells and blank at index blank.
+        #
+        # @type self: MNPuzzle
+        # @type cells: bytes
+        # @type blank: int
+        # @rtype: MNPuzzle
+        move = type(self).__new__(type(self))
+        move.n, move.m, move.to_grid = self.n, self.m, self.to_grid
+        move._layout, move._from_grid = self._layout, None
+        move._cells, move._blank = cells, blank
+        # moves never change whether to_grid can be reached
+        move._unsolvable = self._unsolvable
+        move._h = None
+        return move
 
     def is_solved(self):
         """
@@ -180,7 +457,405 @@ class MNPuzzle(Puzzle):
         @rtype: bool
         """
 
-        return self.from_grid == self.to_grid
+        return self._cells == self._layout.goal
+
+    def fail_fast(self):
+        """
+        Return True if MNPuzzle self can never be extended to a solution.
+
+        Each move swaps the blank with a tile, changing both the parity of
+        the permutation that takes from_grid to to_grid and the parity of
+        the blank's distance from its place in to_grid.  When the two
+        parities differ, no sequence of moves reaches to_grid.  This is
+        worked out in O(nm) once and shared with every extension.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: MNPuzzle
+        @rtype: bool
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> swapped = (("2", "1", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(swapped, target_grid).fail_fast()
+        True
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).fail_fast()
+        False
+        >>> wrong_tile = (("1", "2", "3"), ("4", "6", "*"))
+        >>> MNPuzzle(wrong_tile, target_grid).fail_fast()
+        True
+        """
+        if self._unsolvable is None:
+            self._unsolvable = self._parity_unsolvable()
+        return self._unsolvable
+
+    def _parity_unsolvable(self):
+        # Return True if the parities of MNPuzzle self show that to_grid
+        # can't be reached, or its symbols differ from to_grid's.
+        #
+        # @type self: MNPuzzle
+        # @rtype: bool
+        cells, goal, m = self._cells, self._layout.goal, self.m
+        blank = self._layout.code("*")
+        if len(cells) != len(goal) or len(self.to_grid[0]) != m:
+            return True
+        if len(set(goal)) != len(goal):
+            # with repeated symbols, tiles can trade places unseen
+            return sorted(cells) != sorted(goal)
+        if set(cells) != set(goal) or len(set(cells)) != len(cells):
+            return True
+        if blank not in goal:
+            return cells != goal
+        if self.n == 1 or m == 1:
+            # tiles in a single line can never pass each other
+            return (cells.replace(bytes([blank]), b"") !=
+                    goal.replace(bytes([blank]), b""))
+        # place[i] is where the symbol in cell i belongs, and each cycle of
+        # length k in place takes k - 1 swaps
+        where = {code: i for i, code in enumerate(goal)}
+        place = [where[code] for code in cells]
+        swaps = 0
+        for start in range(len(place)):
+            i = start
+            while place[i] != start:
+                place[i], i = i, place[i]
+                swaps += 1
+            place[i] = i
+        distance = (abs(self._blank // m - goal.index(blank) // m) +
+                    abs(self._blank % m - goal.index(blank) % m))
+        return swaps % 2 != distance % 2
+
+    def heuristic(self):
+        """
+        Return the sum of the Manhattan distances of each tile in from_grid
+        from its place in to_grid, plus the linear conflicts: two extra
+        moves for each tile that must step out of a row or column it
+        belongs in to let others past.  This never overestimates the
+        number of moves left.
+
+        It is worked out in full once; extensions of an MNPuzzle whose
+        heuristic is known update it for the one tile they move.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: MNPuzzle
+        @rtype: int
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        3
+        >>> MNPuzzle(target_grid, target_grid).heuristic()
+        0
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")), \
+target_grid).heuristic()
+        4
+        """
+        if self._h is None:
+            self._h = self._distance()
+        return self._h
+
+    def _distance(self):
+        # Return the heuristic of MNPuzzle self, worked out in full.
+        #
+        # @type self: MNPuzzle
+        # @rtype: int
+        layout, cells, m = self._layout, self._cells, self.m
+        if self._tracks_goal():
+            total = 0
+            for i, code in enumerate(cells):
+                if layout.goal_row[code] >= 0:
+                    r, c = divmod(i, m)
+                    total += (abs(r - layout.goal_row[code]) +
+                              abs(c - layout.goal_col[code]))
+            total += sum([layout.row_conflict(cells, r, m)
+                          for r in range(self.n)])
+            total += sum([layout.col_conflict(cells, c, m)
+                          for c in range(m)])
+            return total
+        # every place each code occupies in to_grid
+        goal, width = {}, len(self.to_grid[0])
+        for i, code in enumerate(self._layout.goal):
+            goal.setdefault(code, []).append(divmod(i, width))
+        blank, total = self._layout.code("*"), 0
+        for i, code in enumerate(self._cells):
+            if code != blank and code in goal:
+                r, c = divmod(i, self.m)
+                total += min([abs(r - gr) + abs(c - gc)
+                              for gr, gc in goal[code]])
+        return total
+
+    def state_key(self):
+        """
+        Return a hashable key identifying the configuration of MNPuzzle self.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: MNPuzzle
+        @rtype: bytes
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> MNPuzzle(start_grid, target_grid).state_key()
+        b'\\x00\\x02\\x03\\x01\\x04\\x05'
+        """
+        return self._cells
+
+
+# first line of a pattern database file; a line of JSON describing the
+# pattern follows, then the table
+_PDB_MAGIC = b"MNPuzzle pattern database 1\n"
+# table entry for abstract states no moves reach
+_UNREACHED = 255
+
+
+def _rank(positions, size):
+    """
+    Return the index of positions, a sequence of distinct cells of a grid
+    with size cells, among all such sequences of the same length.
+
+    @type positions: tuple[int]
+    @type size: int
+    @rtype: int
+
+    >>> [_rank(p, 3) for p in [(0, 1), (0, 2), (1, 0), (2, 1)]]
+    [0, 1, 2, 5]
+    """
+    rank = 0
+    for i, p in enumerate(positions):
+        # cells already taken earlier in positions can't be chosen again
+        taken = len([q for q in positions[:i] if q < p])
+        rank = rank * (size - i) + p - taken
+    return rank
+
+
+def _unrank(rank, k, size):
+    """
+    Return the list of k distinct cells of a grid with size cells that
+    _rank numbers rank.
+
+    @type rank: int
+    @type k: int
+    @type size: int
+    @rtype: list[int]
+
+    >>> [_unrank(r, 2, 3) for r in [0, 1, 2, 5]]
+    [[0, 1], [0, 2], [1, 0], [2, 1]]
+    """
+    digits = []
+    for i in range(k - 1, -1, -1):
+        rank, digit = divmod(rank, size - i)
+        digits.append(digit)
+    positions, free = [], list(range(size))
+    for digit in reversed(digits):
+        positions.append(free.pop(digit))
+    return positions
+
+
+def _region(blank, positions, adjacent):
+    """
+    Return the bits of the cells the blank at cell blank can reach without
+    moving a tile at positions, where adjacent[cell] has the bits of the
+    cells next to cell.
+
+    @type blank: int
+    @type positions: list[int]
+    @type adjacent: list[int]
+    @rtype: int
+
+    >>> bin(_region(0, [1], [0b010, 0b101, 0b010]))
+    '0b1'
+    """
+    occupied = sum([1 << p for p in positions])
+    region = frontier = 1 << blank
+    while frontier:
+        grown = 0
+        while frontier:
+            grown |= adjacent[_lowest(frontier)]
+            frontier &= frontier - 1
+        frontier = grown & ~occupied & ~region
+        region |= frontier
+    return region
+
+
+def _lowest(bits):
+    """
+    Return the lowest cell with a bit set in bits.
+
+    @type bits: int
+    @rtype: int
+
+    >>> _lowest(0b1100)
+    2
+    """
+    return (bits & -bits).bit_length() - 1
+
+
+def build_pattern_database(to_grid, pattern, path):
+    """
+    Write to path a pattern database for MNPuzzles working towards to_grid:
+    for every placement of the tiles in pattern, the fewest moves of those
+    tiles needed to bring them to their places in to_grid, one byte each.
+
+    Other tiles are not told apart from the blank, so moving them is free
+    and each pattern counts only its own tiles' moves.  Databases for
+    disjoint patterns can therefore be added; see additive_heuristic.  The
+    table is filled in by one breadth-first search backwards from to_grid
+    over the placements of the pattern.
+
+    @type to_grid: tuple[tuple[str]]
+    @type pattern: list[str]
+        distinct symbols of to_grid, not including "*"
+    @type path: str
+    @rtype: None
+
+    >>> import os, tempfile
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> path = os.path.join(tempfile.mkdtemp(), "123.pdb")
+    >>> build_pattern_database(target_grid, ["1", "2", "3"], path)
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> PatternDatabase(path).distance(MNPuzzle(start_grid, target_grid))
+    1
+    """
+    to_grid = tuple([tuple(row) for row in to_grid])
+    cells = [x for row in to_grid for x in row]
+    if cells.count("*") != 1:
+        raise ValueError("to_grid must have exactly one blank")
+    if (len(set(pattern)) != len(pattern) or "*" in pattern or
+            any([cells.count(x) != 1 for x in pattern])):
+        raise ValueError("pattern must be distinct tiles of to_grid")
+    n, m, size = len(to_grid), len(to_grid[0]), len(cells)
+    k = len(pattern)
+    # adjacent[cell] has the bits of the cells next to cell
+    adjacent = [sum([1 << j for j, _ in moves]) for moves in _moves(n, m)]
+    entries = 1
+    for i in range(k):
+        entries *= size - i
+    table = bytearray([_UNREACHED]) * entries
+    # an abstract state is a placement and the region of cells the blank
+    # can reach without moving a pattern tile, numbered rank * size plus
+    # the lowest cell of the region; reached has a bit for each, set when
+    # the state is first queued, so each is queued once
+    reached = bytearray((entries * size + 7) // 8)
+    positions = [cells.index(x) for x in pattern]
+    rank = _rank(positions, size)
+    state = rank * size + _lowest(_region(cells.index("*"), positions,
+                                          adjacent))
+    reached[state >> 3] |= 1 << (state & 7)
+    layer = array("Q", [state])
+    depth = 0
+    while layer:
+        next_layer = array("Q")
+        for state in layer:
+            rank, blank = divmod(state, size)
+            # layers are in order of moves, so the first visit is fewest
+            if table[rank] == _UNREACHED:
+                table[rank] = min(depth, _UNREACHED - 1)
+            positions = _unrank(rank, k, size)
+            region = _region(blank, positions, adjacent)
+            for i, p in enumerate(positions):
+                # the tile at p moves into any cell of region beside it,
+                # leaving the blank at p
+                free = region & adjacent[p]
+                while free:
+                    cell = _lowest(free)
+                    free &= free - 1
+                    positions[i] = cell
+                    moved = _rank(positions, size) * size + _lowest(
+                        _region(p, positions, adjacent))
+                    if not reached[moved >> 3] & (1 << (moved & 7)):
+                        reached[moved >> 3] |= 1 << (moved & 7)
+                        next_layer.append(moved)
+                positions[i] = p
+        layer = next_layer
+        depth += 1
+    header = json.dumps({"to_grid": to_grid, "pattern": list(pattern)})
+    with open(path, "wb") as f:
+        f.write(_PDB_MAGIC + header.encode() + b"\n")
+        f.write(table)
+
+
+class PatternDatabase:
+    """
+    A pattern database written by build_pattern_database, mapped into
+    memory rather than read, so it is ready at once and processes using
+    the same file share its pages.
+    """
+
+    def __init__(self, path):
+        """
+        Create a new PatternDatabase self from the file at path.
+
+        @type self: PatternDatabase
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(_PDB_MAGIC)] != _PDB_MAGIC:
+            raise ValueError("{} is not a pattern database".format(path))
+        end = mapped.find(b"\n", len(_PDB_MAGIC))
+        header = json.loads(mapped[len(_PDB_MAGIC):end].decode())
+        # table[_rank(positions)] is the entry for the pattern's tiles at
+        # positions, read straight from the mapped file
+        self.table = memoryview(mapped)[end + 1:]
+        self.to_grid = tuple([tuple(row) for row in header["to_grid"]])
+        self.pattern = header["pattern"]
+        self._size = len(self.to_grid) * len(self.to_grid[0])
+        self._layout = _layout(self.to_grid)
+        self._codes = [self._layout.code(x) for x in self.pattern]
+
+    def distance(self, puzzle):
+        """
+        Return the fewest moves of the tiles in the pattern of
+        PatternDatabase self that could bring them to their places in the
+        to_grid of MNPuzzle puzzle.
+
+        @type self: PatternDatabase
+        @type puzzle: MNPuzzle
+        @rtype: int
+        """
+        cells = puzzle._cells
+        if puzzle._layout is not self._layout or not puzzle._tracks_goal():
+            raise ValueError("puzzle works towards a different to_grid")
+        positions = [cells.find(code) for code in self._codes]
+        if -1 in positions:
+            # a tile of the pattern is missing, so to_grid can't be reached
+            return _UNREACHED
+        return self.table[_rank(positions, self._size)]
+
+
+def additive_heuristic(databases):
+    """
+    Return a heuristic for astar_solve or ida_star_solve adding the
+    distances from databases, PatternDatabases for disjoint patterns of
+    the same to_grid, such as a 7-8 or 6-6-3 split of the 15-puzzle.  No
+    move is counted twice, so the sum never overestimates; where
+    MNPuzzle.heuristic is larger, that is used instead.
+
+    @type databases: list[PatternDatabase]
+    @rtype: (MNPuzzle)->int
+
+    >>> import os, tempfile
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> folder = tempfile.mkdtemp()
+    >>> paths = [os.path.join(folder, name) for name in ["a", "b"]]
+    >>> build_pattern_database(target_grid, ["1", "2", "3"], paths[0])
+    >>> build_pattern_database(target_grid, ["4", "5"], paths[1])
+    >>> h = additive_heuristic([PatternDatabase(p) for p in paths])
+    >>> h(MNPuzzle((("5", "4", "3"), ("1", "2", "*")), target_grid))
+    10
+    """
+    patterns = [x for db in databases for x in db.pattern]
+    if len(set(patterns)) != len(patterns):
+        raise ValueError("additive pattern databases must be disjoint")
+    if len(set([db.to_grid for db in databases])) > 1:
+        raise ValueError("pattern databases must share a to_grid")
+
+    def heuristic(puzzle):
+        return max(sum([db.distance(puzzle) for db in databases]),
+                   puzzle.heuristic())
+    return heuristic
 
 
 
@@ -39,3 +39,84 @@ class Puzzle:
         @rtype: generator[Puzzle]
         """
         raise NotImplementedError
+
+    def state_key(self):
+        """
+        Return a compact hashable key identifying the configuration of
+        Puzzle self, for duplicate detection during a search.
+
+        Two puzzles reached in the same search have equal keys iff they
+        are the same configuration.  Override this in a subclass with a
+        tuple, bytes or int that is cheaper to build than str(self).
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        return str(self)
+
+    def exact_key(self):
+        """
+        Return a hashable key identifying the configuration of Puzzle self
+        exactly, equal only for configurations with the same extensions,
+        even where state_key treats different configurations as one.
+
+        Override this in a subclass whose state_key merges configurations,
+        such as reflections of one another.
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        return self.state_key()
+
+    def heuristic(self):
+        """
+        Return an estimate of the total step cost still needed to get from
+        Puzzle self to a solution, for use in informed searches.
+
+        Override this in a subclass with an admissible estimate, one
+        that never exceeds the true remaining cost.  The default of 0
+        is always admissible.
+
+        @type self: Puzzle
+        @rtype: int | float
+        """
+        return 0
+
+    def step_cost(self, extension):
+        """
+        Return the cost of the move from Puzzle self to extension, one of
+        its extensions.
+
+        Override this in a subclass where moves have different costs.
+
+        @type self: Puzzle
+        @type extension: Puzzle
+        @rtype: int | float
+        """
+        return 1
+
+    def goal_state(self):
+        """
+        Return the solved Puzzle that Puzzle self is working towards, or
+        None if Puzzle self has no single explicit goal.
+
+        Override this, together with reverse_extensions, in a subclass
+        whose moves can be searched backwards from the goal.
+
+        @type self: Puzzle
+        @rtype: Puzzle | None
+        """
+        return None
+
+    def reverse_extensions(self):
+        """
+        Return list of the puzzles that have Puzzle self among their
+        extensions.
+
+        This is an abstract method that must be implemented in a subclass
+        that overrides goal_state.
+
+        @type self: Puzzle
+        @rtype: list[Puzzle]
+        """
+        raise NotImplementedError
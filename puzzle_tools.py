@@ -2,23 +2,39 @@
 Some functions for working with puzzles
 """
 from puzzle import Puzzle
-from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# you may uncomment the next lines on a unix system such as CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
+from array import array
+from bisect import bisect_left
+from collections import deque, OrderedDict
+from functools import partial
+from heapq import heappush, heappop
+from itertools import count
+from io import BytesIO
+import multiprocessing
+from operator import methodcaller
+import os
+import pickle
 import sys
-sys.setrecursionlimit(10**6)
+from time import perf_counter
+import zlib
 
 
-def depth_first_solve(puzzle):
+def depth_first_solve(puzzle, stats=None, cache=None, dead=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
 
+    The search keeps its own stack of pending extensions rather than
+    recursing, so it needs no raised recursion limit however deep the
+    solution lies.
+
     @param Puzzle puzzle: Puzzle
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @param DeadPositions|None dead: states known to have no solution,
+        which are not expanded; states found to have none are added, and
+        saved when the search ends
     @rtype: PuzzleNode| None
 
     >>> from word_ladder_puzzle import WordLadderPuzzle
@@ -33,49 +49,31 @@ def depth_first_solve(puzzle):
     <BLANKLINE>
     <BLANKLINE>
     """
-    seen = set()
-
-    # helper function
-    def recs(puz, set_):
-        """
-        Return a valid solution in the form of PuzzleNode from given puz and
-        make sure to ignore any extensions that are already in set_
-
-        @param Puzzle puz : Puzzle to search
-        @param Set set_: set to track
-        @rtype: PuzzleNode
-        """
-        if not puz.extensions():
-            if puz.is_solved():
-                return PuzzleNode(puz, [])
-            else:
-                return None
-        else:
-            for move in puz.extensions():
-                if str(move) not in seen:
-                    set_.add(str(move))
-                    r = recs(move, set_)
-                    if not r:
-                        continue
-                    else:
-                        curr = PuzzleNode(puz, [r], None)
-                        r.parent = curr
-                        return curr
-    return recs(puzzle, seen)
+    try:
+        return _first(_depth_first_solutions(puzzle, stats, cache, dead))
+    finally:
+        if dead is not None:
+            dead.save()
 
 
-def breadth_first_solve(puzzle):
+def breadth_first_solve(puzzle, stats=None, cache=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
     @type puzzle: Puzzle
+    @type stats: SearchStats | None
+        filled in with measurements of the search
+    @type cache: TranspositionTable | None
+        extensions of states expanded before, consulted before expanding
+        a puzzle again
     @rtype: PuzzleNode
 
     >>> from word_ladder_puzzle import WordLadderPuzzle
     >>> pn2 = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
-    >>> sol = breadth_first_solve(pn2)
+    >>> stats = SearchStats()
+    >>> sol = breadth_first_solve(pn2, stats)
     >>> print(sol)
     on -> no
     <BLANKLINE>
@@ -84,54 +82,985 @@ def breadth_first_solve(puzzle):
     no -> no
     <BLANKLINE>
     <BLANKLINE>
+    >>> stats.nodes_expanded, stats.nodes_generated, stats.duplicates
+    (2, 3, 1)
+    """
+    return _first(_breadth_first_solutions(puzzle, stats, cache))
+
+
+def iter_solutions(puzzle, strategy="dfs", stats=None, cache=None):
     """
-    q = deque()
-    q.append(PuzzleNode(puzzle))
-    seen = set()
-    # if q is not empty
-    while q:
-        # pop first node entered
-        lnk = q.popleft()
-        # check if node is solution
-        if lnk.puzzle.is_solved():
-            # return lnk
-            if not lnk.parent:
-                return lnk
+    Yield a path from PuzzleNode(puzzle) to each solution reachable from
+    puzzle, in the form returned by depth_first_solve or
+    breadth_first_solve.
+
+    Solutions are found lazily, so the search goes no further than the
+    caller asks for.  Each state is reached at most once, so each
+    distinct solved state is yielded exactly once, by one of the paths to
+    it.  Solved puzzles are not extended further.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param str strategy: "dfs" for depth-first order, or "bfs" for
+        breadth-first order, which yields shorter paths first
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @rtype: generator[PuzzleNode]
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> solutions = iter_solutions(s)
+    >>> sol = next(solutions)
+    >>> while sol.children:
+    ...     sol = sol.children[0]
+    >>> sol.puzzle.is_solved()
+    True
+    >>> list(iter_solutions(s, "sideways"))
+    Traceback (most recent call last):
+    ...
+    ValueError: unknown search strategy 'sideways'
+    """
+    if strategy == "dfs":
+        return _depth_first_solutions(puzzle, stats, cache)
+    elif strategy == "bfs":
+        return _breadth_first_solutions(puzzle, stats, cache)
+    raise ValueError("unknown search strategy {!r}".format(strategy))
+
+
+def count_solutions(puzzle, limit=None, strategy="dfs", stats=None,
+                    cache=None):
+    """
+    Return the number of distinct solved states reachable from puzzle,
+    stopping the search as soon as limit of them have been found.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param int|None limit: most solutions to look for; all when None
+    @param str strategy: search order, as for iter_solutions
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @rtype: int
+
+    >>> from sudoku_puzzle import SudokuPuzzle
+    >>> grid = ["A", "B", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> grid += ["*", "*", "*", "*"]
+    >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+    >>> count_solutions(s)
+    24
+    >>> count_solutions(s, limit=2)
+    2
+    >>> count_solutions(s, limit=0)
+    0
+    """
+    if limit is not None and limit <= 0:
+        return 0
+    solutions = iter_solutions(puzzle, strategy, stats, cache)
+    total = 0
+    try:
+        for _ in solutions:
+            total += 1
+            if total == limit:
+                break
+    finally:
+        solutions.close()
+    return total
+
+
+def _expander(stats, cache, puzzle):
+    """
+    Return a function that returns the extensions of a puzzle reached in
+    a search from puzzle, measured by stats and looked up in cache first
+    when there is one.
+
+    @param SearchStats stats: measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before
+    @param Puzzle puzzle: the puzzle the search starts from
+    @rtype: (Puzzle)->list[Puzzle]
+    """
+    if cache is None:
+        return stats.extensions
+    # every puzzle in the search shares the goal of puzzle
+    return partial(cache.extensions, expand=stats.extensions,
+                   goal=TranspositionTable.goal(puzzle))
+
+
+def _pruned(puzzle, stats):
+    """
+    Return whether a search can drop puzzle: fail_fast rules it out and it
+    is not itself solved.
+
+    @param Puzzle puzzle: a puzzle reached by a search
+    @param SearchStats stats: measurements of the search
+    @rtype: bool
+    """
+    return stats.fail_fast(puzzle) and not stats.is_solved(puzzle)
+
+
+def _first(solutions):
+    """
+    Return the first path yielded by solutions, or None if there is none,
+    and end the search.
+
+    @param generator[PuzzleNode] solutions: a search in progress
+    @rtype: PuzzleNode | None
+    """
+    try:
+        return next(solutions, None)
+    finally:
+        solutions.close()
+
+
+def _depth_first_solutions(puzzle, stats, cache, dead=None):
+    """
+    Yield a path to each solution reachable from puzzle, searching
+    depth-first with an explicit stack.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @param DeadPositions|None dead: states known to have no solution,
+        added to until the first solution is found
+    @rtype: generator[PuzzleNode]
+    """
+    stats = _UNCOUNTED if stats is None else stats
+    expand = _expander(stats, cache, puzzle)
+    stats.start()
+    try:
+        if stats.is_solved(puzzle):
+            stats.stop()
+            yield PuzzleNode(puzzle)
+            return
+        if stats.fail_fast(puzzle) or (dead is not None and
+                                       puzzle.state_key() in dead):
+            return
+        seen = set()
+        # each entry is a puzzle on the current path, with an iterator over
+        # the extensions of it that are still to be tried
+        stack = [(puzzle, iter(expand(puzzle)))]
+        while stack:
+            for move in stack[-1][1]:
+                key = move.state_key()
+                if key in seen:
+                    stats.duplicate()
+                    continue
+                seen.add(key)
+                if stats.is_solved(move):
+                    # the caller's time between solutions isn't search time
+                    stats.stop()
+                    yield chain([puz for puz, _ in stack] + [move])
+                    stats.start()
+                    # puzzles left on the stack now lead to a solution
+                    dead = None
+                    continue
+                if stats.fail_fast(move) or (dead is not None and
+                                             key in dead):
+                    continue
+                # descend into move before trying its siblings
+                stack.append((move, iter(expand(move))))
+                stats.reached(len(stack), len(seen))
+                break
             else:
-                return invert(lnk)
-        # popped value isn't solution
+                # every extension of the top puzzle has been tried, and
+                # none led to a solution
+                top, _ = stack.pop()
+                if dead is not None:
+                    dead.add(top.state_key())
+    finally:
+        stats.stop()
+
+
+def _breadth_first_solutions(puzzle, stats, cache):
+    """
+    Yield a path to each solution reachable from puzzle, searching
+    breadth-first, so that shorter paths come first.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @rtype: generator[PuzzleNode]
+    """
+    stats = _UNCOUNTED if stats is None else stats
+    expand = _expander(stats, cache, puzzle)
+    stats.start()
+    try:
+        q = deque()
+        if not _pruned(puzzle, stats):
+            q.append(SearchNode(puzzle))
+        seen = {puzzle.state_key()}
+        # if q is not empty
+        while q:
+            # pop first node entered
+            lnk = q.popleft()
+            # check if node is solution
+            if stats.is_solved(lnk.puzzle):
+                # the caller's time between solutions isn't search time
+                stats.stop()
+                yield lnk.path()
+                stats.start()
+                continue
+            # popped value isn't solution
+            moves = expand(lnk.puzzle)
+            for move in moves:
+                key = move.state_key()
+                if key in seen:
+                    stats.duplicate()
+                    continue
+                seen.add(key)
+                # don't queue extensions that can never lead to a solution
+                if not _pruned(move, stats):
+                    q.append(SearchNode(move, lnk))
+            stats.reached(len(q), len(seen))
+    finally:
+        stats.stop()
+
+
+def parallel_breadth_first_solve(puzzle, workers=None, min_parallel_layer=256,
+                                 stats=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    The search runs one layer at a time, in this process until a layer
+    holds min_parallel_layer puzzles.  From then on worker processes
+    expand the layer, each keeping the puzzles it generates.  Only state
+    keys move between them: each worker owns the keys _owner assigns it,
+    remembers the key each was reached from, and tells the worker that
+    generated a key whether it is new, which then keeps that puzzle for
+    the next layer.  This process routes the keys between workers as
+    bytes, and fetches puzzles only for the path to a solution.  Puzzles
+    must be picklable; whatever they share with puzzle, such as the word
+    list of a word ladder, is sent as a reference to the receiver's copy.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param int|None workers: number of worker processes; the number of
+        CPUs when None
+    @param int min_parallel_layer: layers with fewer puzzles than this are
+        expanded in this process, until one has at least this many,
+        where starting workers would cost more than it saves
+    @param SearchStats|None stats: filled in with measurements of the
+        search, including those made in the workers
+    @rtype: PuzzleNode | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> pn2 = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
+    >>> sol = parallel_breadth_first_solve(pn2, workers=2,
+    ...                                    min_parallel_layer=1)
+    >>> print(sol)
+    on -> no
+    <BLANKLINE>
+    oo -> no
+    <BLANKLINE>
+    no -> no
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    measure = stats is not None
+    stats = _UNCOUNTED if stats is None else stats
+    stats.start()
+    try:
+        if stats.is_solved(puzzle):
+            return PuzzleNode(puzzle)
+        if stats.fail_fast(puzzle):
+            return None
+        if workers is None:
+            workers = os.cpu_count() or 1
+        key = puzzle.state_key()
+        # map the state key of each puzzle reached in this process to the
+        # puzzle and the key of the puzzle it was reached from
+        reached = {key: (puzzle, None)}
+        layer = [(key, puzzle)]
+        while layer and len(layer) < min_parallel_layer:
+            stats.reached(len(layer), len(reached))
+            part, part_stats = _expand_partition(layer, measure)
+            if part_stats is not None:
+                stats.merge(part_stats)
+            layer = []
+            for key, move, parent, solved in part:
+                if key in reached:
+                    stats.duplicate()
+                    continue
+                reached[key] = (move, parent)
+                if solved:
+                    return _path(key, reached, None)
+                layer.append((key, move))
+        if not layer:
+            return None
+        return _sharded_solve(puzzle, layer, reached, workers, measure,
+                              stats)
+    finally:
+        stats.stop()
+
+
+def _sharded_solve(puzzle, layer, reached, workers, measure, stats):
+    """
+    Return a shortest path to a solution, as parallel_breadth_first_solve
+    does, carrying on its search from layer with worker processes that
+    each own a share of the states.
+
+    @param Puzzle puzzle: the puzzle the search started from
+    @param list[(Hashable, Puzzle)] layer: the puzzles to expand next,
+        with their keys
+    @param dict[Hashable, (Puzzle, Hashable)] reached: the puzzles reached
+        so far by key, with the key of the puzzle each was reached from
+    @param int workers: number of worker processes
+    @param bool measure: whether to measure the work done in the workers
+    @param SearchStats stats: measurements of the search
+    @rtype: PuzzleNode | None
+    """
+    shared = _shared(puzzle)
+    context = multiprocessing.get_context()
+    pipes, processes = [], []
+    try:
+        for index in range(workers):
+            pipe, end = context.Pipe()
+            process = context.Process(target=_shard, daemon=True,
+                                      args=(end, workers, puzzle, measure))
+            process.start()
+            end.close()
+            pipes.append(pipe)
+            processes.append(process)
+        # each worker gets the keys it owns of the states reached so far,
+        # so it can drop them when they are reached again, and a share of
+        # layer; the path to layer stays in this process
+        old = [[] for _ in range(workers)]
+        shares = [[] for _ in range(workers)]
+        for key in reached:
+            old[_owner(key, workers)].append(key)
+        for index, entry in enumerate(layer):
+            shares[index % workers].append(entry)
+        for pipe, keys, share in zip(pipes, old, shares):
+            pipe.send(("seed", _pack((keys, share), shared)))
+        frontier, total = len(layer), len(reached)
+        while frontier:
+            stats.reached(frontier, total)
+            for pipe in pipes:
+                pipe.send(("expand",))
+            outboxes = []
+            for pipe in pipes:
+                outbox, part_stats = pipe.recv()
+                if part_stats is not None:
+                    stats.merge(part_stats)
+                outboxes.append(outbox)
+            # each owner takes the keys generated for it in order of
+            # worker, which keeps the result deterministic
+            for index, pipe in enumerate(pipes):
+                pipe.send(("merge", [outbox[index] for outbox in outboxes]))
+            replies = [pipe.recv() for pipe in pipes]
+            frontier, total, solved = 0, 0, None
+            for new, seen, found, part_stats, _ in replies:
+                if part_stats is not None:
+                    stats.merge(part_stats)
+                frontier, total = frontier + new, total + seen
+                if solved is None and found is not None:
+                    solved = found
+            for index, pipe in enumerate(pipes):
+                pipe.send(("keep", [reply[4][index] for reply in replies]))
+            if solved is not None:
+                return _path(pickle.loads(solved), reached, pipes, shared)
+        return None
+    finally:
+        for pipe in pipes:
+            try:
+                pipe.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+
+def _path(key, reached, pipes, shared):
+    """
+    Return the path of PuzzleNodes from the start of a search of
+    parallel_breadth_first_solve to the puzzle with key, following the
+    keys each puzzle was reached from, through the worker processes and
+    then reached.
+
+    @param Hashable key: the state key of the last puzzle on the path
+    @param dict[Hashable, (Puzzle, Hashable)] reached: puzzles reached in
+        this process by key, with the key each was reached from
+    @param list[Connection] pipes: the connections to the workers
+    @param list[object] shared: what puzzles share with the first
+    @rtype: PuzzleNode
+    """
+    path = []
+    while key not in reached:
+        owner = pipes[_owner(key, len(pipes))]
+        owner.send(("parent", pickle.dumps(key, pickle.HIGHEST_PROTOCOL)))
+        parent, generator = pickle.loads(owner.recv())
+        pipes[generator].send(
+            ("puzzle", pickle.dumps(key, pickle.HIGHEST_PROTOCOL)))
+        path.append(_unpack(pipes[generator].recv(), shared))
+        key = parent
+    while key is not None:
+        move, key = reached[key]
+        path.append(move)
+    path.reverse()
+    return chain(path)
+
+
+def _owner(key, workers):
+    """
+    Return which of workers worker processes owns the state with key, the
+    same in every process.
+
+    @param Hashable key: a state key
+    @param int workers: the number of worker processes
+    @rtype: int
+
+    >>> [_owner(key, 3) for key in [7, "on", b"on", (1, 2)]]
+    [1, 0, 0, 0]
+    """
+    if isinstance(key, int):
+        return key % workers
+    if isinstance(key, str):
+        key = key.encode("UTF-8", "surrogatepass")
+    elif not isinstance(key, bytes):
+        key = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+    return zlib.crc32(key) % workers
+
+
+def _shard(pipe, workers, puzzle, measure):
+    """
+    Serve one worker process of parallel_breadth_first_solve, answering
+    the messages sent through pipe until told to stop.
+
+    @param Connection pipe: the connection to the searching process
+    @param int workers: the number of worker processes
+    @param Puzzle puzzle: the puzzle the search started from
+    @param bool measure: whether to measure the work done
+    @rtype: None
+    """
+    shared = _shared(puzzle)
+    # the key each state owned here was reached from and the worker that
+    # keeps its puzzle, or None for states reached before workers started
+    seen = {}
+    # the puzzles generated here that were new, by key
+    kept = {}
+    # this worker's share of the layer to expand next, and the keys and
+    # puzzles it generated last, by the worker owning them
+    layer, pending = [], []
+    while True:
+        message = pipe.recv()
+        if message[0] == "seed":
+            keys, layer = _unpack(message[1], shared)
+            seen.update(dict.fromkeys(keys))
+        elif message[0] == "expand":
+            part, part_stats = _expand_partition(layer, measure)
+            layer = []
+            pending = [[] for _ in range(workers)]
+            outbox = [[] for _ in range(workers)]
+            for key, move, parent, solved in part:
+                owner = _owner(key, workers)
+                pending[owner].append((key, move))
+                outbox[owner].append((key, parent, solved))
+            pipe.send(([pickle.dumps(keys, pickle.HIGHEST_PROTOCOL)
+                        for keys in outbox], part_stats))
+        elif message[0] == "merge":
+            merge_stats = SearchStats() if measure else _UNCOUNTED
+            accepted, new, solved = [], 0, None
+            for generator, packed in enumerate(message[1]):
+                indices = array("I")
+                for i, (key, parent, is_solved) in enumerate(
+                        pickle.loads(packed)):
+                    if key in seen:
+                        merge_stats.duplicate()
+                        continue
+                    seen[key] = (parent, generator)
+                    indices.append(i)
+                    if is_solved and solved is None:
+                        solved = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+                new += len(indices)
+                accepted.append(indices)
+            pipe.send((new, len(seen), solved,
+                       merge_stats if measure else None, accepted))
+        elif message[0] == "keep":
+            for owner, indices in enumerate(message[1]):
+                generated = pending[owner]
+                for i in indices:
+                    key, move = generated[i]
+                    kept[key] = move
+                    layer.append((key, move))
+            pending = []
+        elif message[0] == "parent":
+            pipe.send(pickle.dumps(seen[pickle.loads(message[1])],
+                                   pickle.HIGHEST_PROTOCOL))
+        elif message[0] == "puzzle":
+            pipe.send(_pack(kept[pickle.loads(message[1])], shared))
         else:
-            # if node not in seen and has extensions
-            if lnk.puzzle.extensions() != [] and not puzzle.fail_fast():
-                for move in lnk.puzzle.extensions():
-                    if str(move) not in seen:
-                        seen.add(str(move))
-                        q.append(PuzzleNode(move, [], lnk))
-            # if node is in seen or doesnt have extensions
+            return
+
+
+def _shared(puzzle):
+    """
+    Return the values of the attributes of puzzle, which the puzzles it
+    extends to may share with it.
+
+    @param Puzzle puzzle: the puzzle a search starts from
+    @rtype: list[object]
+    """
+    return list(getattr(puzzle, "__dict__", {}).values())
+
+
+class _SharedPickler(pickle.Pickler):
+    """
+    A Pickler writing a reference in place of each of a list of shared
+    objects.
+    """
+
+    def __init__(self, file, shared):
+        """
+        Create a new _SharedPickler self writing to file, referring to the
+        objects in shared by their index.
+
+        @type self: _SharedPickler
+        @type file: BytesIO
+        @type shared: list[object]
+        @rtype: None
+        """
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._shared = shared
+        self._index = {id(value): i for i, value in enumerate(shared)}
+
+    def reducer_override(self, obj):
+        """
+        Return how to pickle obj as a reference when it is one of the
+        shared objects of _SharedPickler self, or NotImplemented to pickle
+        it as usual.  Only called for objects other than None, bools,
+        numbers, strings, bytes and the built-in containers, so pickling
+        the rest costs no more than with a plain Pickler.
+
+        @type self: _SharedPickler
+        @type obj: object
+        @rtype: tuple | NotImplemented
+        """
+        i = self._index.get(id(obj))
+        if i is not None and self._shared[i] is obj:
+            return _shared_value, (i,)
+        return NotImplemented
+
+
+class _SharedUnpickler(pickle.Unpickler):
+    """
+    An Unpickler reading the references a _SharedPickler writes as the
+    objects of its own list of shared objects.
+    """
+
+    def __init__(self, file, shared):
+        """
+        Create a new _SharedUnpickler self reading from file, with shared
+        the objects references stand for.
+
+        @type self: _SharedUnpickler
+        @type file: BytesIO
+        @type shared: list[object]
+        @rtype: None
+        """
+        super().__init__(file)
+        self._shared = shared
+
+    def find_class(self, module, name):
+        """
+        Return the function named name in module, with the references a
+        _SharedPickler writes looked up in the shared objects of
+        _SharedUnpickler self.
+
+        @type self: _SharedUnpickler
+        @type module: str
+        @type name: str
+        @rtype: object
+        """
+        if (module, name) == (__name__, "_shared_value"):
+            return self._shared.__getitem__
+        return super().find_class(module, name)
+
+
+def _shared_value(i):
+    """
+    Stand for the shared object with index i in what _pack pickles; only
+    _unpack, which looks it up in its own shared objects, can read it.
+
+    @param int i: the index of the object
+    @rtype: object
+    """
+    raise pickle.UnpicklingError(
+        "shared object {} can only be read by _unpack".format(i))
+
+
+def _pack(obj, shared):
+    """
+    Return obj pickled with references in place of the objects in shared.
+
+    @param object obj: what to pickle
+    @param list[object] shared: objects the reader has its own copies of,
+        none of them None, a bool, number, string, bytes or built-in
+        container
+    @rtype: bytes
+
+    >>> big = SearchStats()
+    >>> big.nodes_expanded = 10 ** 100
+    >>> packed = _pack([big, [big]], [big])
+    >>> mine = SearchStats()
+    >>> value = _unpack(packed, [mine])
+    >>> value[0] is mine and value[1][0] is mine
+    True
+    """
+    file = BytesIO()
+    _SharedPickler(file, shared).dump(obj)
+    return file.getvalue()
+
+
+def _unpack(packed, shared):
+    """
+    Return the object _pack pickled into packed, with the objects in
+    shared in place of the references to them.
+
+    @param bytes packed: what _pack returned
+    @param list[object] shared: the reader's copies of the shared objects
+    @rtype: object
+    """
+    return _SharedUnpickler(BytesIO(packed), shared).load()
+
+
+def _expand_partition(partition, measure=False):
+    """
+    Return (state key, extension, state key of its parent, whether it is
+    solved) for the extensions of the puzzles in partition, skipping any
+    state key already returned or that fail_fast rules out, along with a
+    SearchStats of the work if measure is True, or None.
+
+    Runs in parallel_breadth_first_solve and its worker processes.
+
+    @param list[(Hashable, Puzzle)] partition: puzzles with their keys
+    @param bool measure: whether to measure the work done
+    @rtype: (list[(Hashable, Puzzle, Hashable, bool)], SearchStats | None)
+    """
+    stats = SearchStats() if measure else _UNCOUNTED
+    seen, expanded = set(), []
+    for key, puz in partition:
+        for move in stats.extensions(puz):
+            move_key = move.state_key()
+            if move_key in seen:
+                stats.duplicate()
+                continue
+            seen.add(move_key)
+            solved = stats.is_solved(move)
+            if solved or not stats.fail_fast(move):
+                expanded.append((move_key, move, key, solved))
+    return expanded, (stats if measure else None)
+
+
+def bidirectional_solve(puzzle, stats=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Breadth-first searches run forwards from puzzle and backwards from
+    puzzle.goal_state() through reverse_extensions, a whole layer of the
+    smaller frontier at a time, until they meet.  Puzzles with no goal
+    state are solved with breadth_first_solve instead.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param SearchStats|None stats: filled in with measurements of the search
+    @rtype: PuzzleNode | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> pn2 = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
+    >>> sol = bidirectional_solve(pn2)
+    >>> print(sol)
+    on -> no
+    <BLANKLINE>
+    oo -> no
+    <BLANKLINE>
+    no -> no
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    goal = puzzle.goal_state()
+    if goal is None:
+        return breadth_first_solve(puzzle, stats)
+    stats = _UNCOUNTED if stats is None else stats
+    stats.start()
+    try:
+        if stats.is_solved(puzzle):
+            return PuzzleNode(puzzle)
+        if stats.fail_fast(puzzle):
+            return None
+        # map the state key of each puzzle reached from either end to the
+        # puzzle, the key of the puzzle it was reached from and its depth
+        forward = {puzzle.state_key(): (puzzle, None, 0)}
+        backward = {goal.state_key(): (goal, None, 0)}
+        forward_layer, backward_layer = [puzzle], [goal]
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meet = _expand_layer(
+                    forward_layer, forward, backward, stats.extensions, stats,
+                    True)
             else:
+                # puzzles reached backwards from the goal can always be
+                # extended to it, so fail_fast has nothing to prune there
+                backward_layer, meet = _expand_layer(
+                    backward_layer, backward, forward,
+                    stats.reverse_extensions, stats, False)
+            stats.reached(len(forward_layer) + len(backward_layer),
+                          len(forward) + len(backward))
+            if meet is not None:
+                path = []
+                while meet is not None:
+                    move, meet, _ = forward[meet]
+                    path.append(move)
+                path.reverse()
+                meet = backward[path[-1].state_key()][1]
+                while meet is not None:
+                    move, meet, _ = backward[meet]
+                    path.append(move)
+                return chain(path)
+        return None
+    finally:
+        stats.stop()
+
+
+def _expand_layer(layer, reached, other, expand, stats, prune):
+    """
+    Return the next layer of one side of a bidirectional search, and the
+    key of a puzzle where it meets the other side on a shortest path, or
+    None if the sides have not met.
+
+    @param list[Puzzle] layer: puzzles furthest from this side's end
+    @param dict reached: this side's map of state keys to
+        (puzzle, key of previous puzzle, depth), updated in place
+    @param dict other: the other side's map of the same form
+    @param (Puzzle)->list[Puzzle] expand: this side's move generator
+    @param SearchStats stats: measurements of the search
+    @param bool prune: whether to drop puzzles that fail_fast rules out
+    @rtype: (list[Puzzle], Hashable | None)
+    """
+    next_layer, meet, best = [], None, float("inf")
+    for puz in layer:
+        key = puz.state_key()
+        depth = reached[key][2] + 1
+        for move in expand(puz):
+            move_key = move.state_key()
+            if move_key in reached:
+                stats.duplicate()
                 continue
-    return None
+            reached[move_key] = (move, key, depth)
+            if prune and _pruned(move, stats):
+                continue
+            next_layer.append(move)
+            # the whole layer is finished before stopping, since a
+            # later meeting may be closer to the other end
+            if move_key in other and depth + other[move_key][2] < best:
+                meet, best = move_key, depth + other[move_key][2]
+    return next_layer, meet
 
 
-# helper method to breadth first search
-def invert(lk):
+def astar_solve(puzzle, heuristic=None, stats=None, cache=None):
     """
-    Return a valid path, made up of a list of PuzzleNode children, after linking
-    the parent references from lk
+    Return a cheapest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Puzzles are expanded in order of path cost so far plus heuristic, the
+    estimated cost still to go, using a binary heap.  The path is
+    cheapest as long as heuristic never overestimates.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param (Puzzle)->int|float|None heuristic: estimate of the remaining
+        cost from a Puzzle; Puzzle.heuristic when None
+    @param SearchStats|None stats: filled in with measurements of the search
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @rtype: PuzzleNode | None
 
-    @param PuzzleNode lk: PuzzleNode that has a parent reference
-    @return: PuzzleNode
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> pn2 = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
+    >>> sol = astar_solve(pn2)
+    >>> print(sol)
+    on -> no
+    <BLANKLINE>
+    oo -> no
+    <BLANKLINE>
+    no -> no
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> sol = astar_solve(MNPuzzle(start_grid, target_grid))
+    >>> while sol.children:
+    ...     sol = sol.children[0]
+    >>> sol.puzzle.is_solved()
+    True
     """
-    q = deque()
-    q.append(lk)
-    while q:
-        val = q.pop()
-        if val.parent:
-            pn = val.parent
-            pn.children.append(val)
-            q.append(pn)
-        else:
-            return val
+    if heuristic is None:
+        heuristic = methodcaller("heuristic")
+    stats = _UNCOUNTED if stats is None else stats
+    expand = _expander(stats, cache, puzzle)
+    stats.start()
+    try:
+        if _pruned(puzzle, stats):
+            return None
+        # the counter breaks ties between equal estimates in insertion
+        # order, so that puzzles themselves are never compared
+        counter = count()
+        best = {puzzle.state_key(): 0}
+        heap = [(heuristic(puzzle), next(counter), 0, SearchNode(puzzle))]
+        while heap:
+            _, _, cost, lnk = heappop(heap)
+            key = lnk.puzzle.state_key()
+            if cost > best[key]:
+                # a cheaper path to this puzzle was found after it was pushed
+                continue
+            if stats.is_solved(lnk.puzzle):
+                return lnk.path()
+            for move in expand(lnk.puzzle):
+                move_cost = cost + lnk.puzzle.step_cost(move)
+                move_key = move.state_key()
+                if move_key in best and move_cost >= best[move_key]:
+                    stats.duplicate()
+                    continue
+                best[move_key] = move_cost
+                if _pruned(move, stats):
+                    continue
+                heappush(heap, (move_cost + heuristic(move), next(counter),
+                                move_cost, SearchNode(move, lnk)))
+            stats.reached(len(heap), len(best))
+        return None
+    finally:
+        stats.stop()
+
+
+def ida_star_solve(puzzle, heuristic=None, report=None, stats=None,
+                   cache=None):
+    """
+    Return a cheapest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, with each child PuzzleNode containing an
+    extension of the puzzle in its parent.  Return None if this is not
+    possible.
+
+    Runs a series of depth-first searches, each cut off where path cost
+    plus heuristic exceeds a threshold that starts at the estimate for
+    puzzle and rises to the smallest cut-off value of the previous
+    iteration.  Only the current path is kept, and checked for cycles,
+    so memory grows with solution depth rather than with the number of
+    puzzles reached.
+
+    @param Puzzle puzzle: Puzzle to solve
+    @param (Puzzle)->int|float|None heuristic: estimate of the remaining
+        cost from a Puzzle; Puzzle.heuristic when None
+    @param (int|float)->Any|None report: called with the threshold at the
+        start of each iteration
+    @param SearchStats|None stats: filled in with measurements of the
+        search; repeats on the current path count as duplicates
+    @param TranspositionTable|None cache: extensions of states expanded
+        before, consulted before expanding a puzzle again
+    @rtype: PuzzleNode | None
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("2", "4", "3"), ("1", "5", "*"))
+    >>> sol = ida_star_solve(MNPuzzle(start_grid, target_grid), report=print)
+    4
+    6
+    >>> length = 0
+    >>> while sol.children:
+    ...     sol, length = sol.children[0], length + 1
+    >>> length
+    6
+    """
+    if heuristic is None:
+        heuristic = methodcaller("heuristic")
+    stats = _UNCOUNTED if stats is None else stats
+    expand = _expander(stats, cache, puzzle)
+    stats.start()
+    try:
+        if stats.is_solved(puzzle):
+            return PuzzleNode(puzzle)
+        if stats.fail_fast(puzzle):
+            return None
+        threshold = heuristic(puzzle)
+        while threshold != float("inf"):
+            if report is not None:
+                report(threshold)
+            # smallest estimate that was cut off during this iteration
+            exceeded = float("inf")
+            path, costs = [puzzle], [0]
+            on_path = {puzzle.state_key()}
+            keys = [puzzle.state_key()]
+            moves = [iter(expand(puzzle))]
+            while moves:
+                for move in moves[-1]:
+                    key = move.state_key()
+                    if key in on_path:
+                        stats.duplicate()
+                        continue
+                    cost = costs[-1] + path[-1].step_cost(move)
+                    estimate = cost + heuristic(move)
+                    if estimate > threshold:
+                        exceeded = min(exceeded, estimate)
+                        continue
+                    if stats.is_solved(move):
+                        return chain(path + [move])
+                    if stats.fail_fast(move):
+                        continue
+                    # descend into move before trying its siblings
+                    path.append(move)
+                    costs.append(cost)
+                    keys.append(key)
+                    on_path.add(key)
+                    moves.append(iter(expand(move)))
+                    stats.reached(len(moves), len(on_path))
+                    break
+                else:
+                    # every extension of the last puzzle on path was tried
+                    path.pop()
+                    costs.pop()
+                    on_path.discard(keys.pop())
+                    moves.pop()
+            threshold = exceeded
+        return None
+    finally:
+        stats.stop()
+
+
+def chain(puzzles):
+    """
+    Return the first PuzzleNode of a path through puzzles, with each
+    PuzzleNode linked to the next one as its only child.
+
+    @param list[Puzzle] puzzles: non-empty sequence of puzzles on the path
+    @rtype: PuzzleNode
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"on", "oo", "no"}
+    >>> path = chain([WordLadderPuzzle(w, "no", ws) for w in ["on", "no"]])
+    >>> path.children[0].parent is path
+    True
+    >>> path.children[0].children
+    []
+    """
+    root = node = PuzzleNode(puzzles[0])
+    for puz in puzzles[1:]:
+        child = PuzzleNode(puz, [], node)
+        node.children.append(child)
+        node = child
+    return root
 
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
@@ -186,5 +1115,586 @@ class PuzzleNode:
 
         # doctest not feasible.
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
\ No newline at end of file
+        # walk the tree with an explicit stack, so that long solution paths
+        # don't exhaust the recursion limit; each node renders as its
+        # puzzle followed by its children separated by newlines
+        parts, stack = [], [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            else:
+                parts.append("{}\n\n".format(item.puzzle))
+                for i in range(len(item.children) - 1, -1, -1):
+                    stack.append(item.children[i])
+                    if i > 0:
+                        stack.append("\n")
+        return "".join(parts)
+
+
+class SearchNode:
+    """
+    A Puzzle reached during a search, with a reference to the SearchNode
+    it was reached from.
+
+    Solvers keep one SearchNode per puzzle they reach, so it holds nothing
+    else; a PuzzleNode path is only built for the solution.
+    """
+    __slots__ = ("puzzle", "parent")
+
+    def __init__(self, puzzle, parent=None):
+        """
+        Create a new search node self for puzzle, reached from parent.
+
+        @type self: SearchNode
+        @type puzzle: Puzzle
+        @type parent: SearchNode | None
+        @rtype: None
+        """
+        self.puzzle, self.parent = puzzle, parent
+
+    def path(self):
+        """
+        Return the first PuzzleNode of the path from the root of the search
+        to SearchNode self.
+
+        @type self: SearchNode
+        @rtype: PuzzleNode
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> ws = {"on", "oo", "no"}
+        >>> root = SearchNode(WordLadderPuzzle("on", "no", ws))
+        >>> node = SearchNode(WordLadderPuzzle("oo", "no", ws), root)
+        >>> node = SearchNode(WordLadderPuzzle("no", "no", ws), node)
+        >>> print(node.path())
+        on -> no
+        <BLANKLINE>
+        oo -> no
+        <BLANKLINE>
+        no -> no
+        <BLANKLINE>
+        <BLANKLINE>
+        """
+        puzzles, node = [], self
+        while node is not None:
+            puzzles.append(node.puzzle)
+            node = node.parent
+        puzzles.reverse()
+        return chain(puzzles)
+
+
+class LRUCache:
+    """
+    A map that holds at most max_entries entries and, by an estimate of
+    their sizes, at most max_bytes bytes, evicting the least recently used
+    entries to stay within both budgets.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        """
+        Create a new empty LRUCache self.  A budget of None is unlimited.
+
+        @type self: LRUCache
+        @type max_entries: int | None
+        @type max_bytes: int | None
+        @rtype: None
+        """
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self.hits, self.misses, self.size = 0, 0, 0
+        # key -> (value, estimated size), oldest first
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """
+        Return the number of entries in LRUCache self.
+
+        @type self: LRUCache
+        @rtype: int
+        """
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """
+        Return whether LRUCache self holds an entry for key, without
+        counting as a use of it.
+
+        @type self: LRUCache
+        @type key: Hashable
+        @rtype: bool
+        """
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Return the value stored for key in LRUCache self, marking it as
+        the most recently used, or default if there is none.
+
+        @type self: LRUCache
+        @type key: Hashable
+        @type default: object
+        @rtype: object
+
+        >>> cache = LRUCache(max_entries=2)
+        >>> cache.put("a", 1)
+        >>> cache.put("b", 2)
+        >>> cache.get("a")
+        1
+        >>> cache.put("c", 3)
+        >>> cache.get("b") is None, len(cache)
+        (True, 2)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size=None):
+        """
+        Store value for key in LRUCache self as the most recently used
+        entry, evicting others as needed to stay within budget.
+
+        @type self: LRUCache
+        @type key: Hashable
+        @type value: object
+        @type size: int | None
+            bytes the entry occupies; estimated with sys.getsizeof when None
+        @rtype: None
+        """
+        if size is None:
+            size = sys.getsizeof(key) + sys.getsizeof(value)
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.size += size
+        while self._entries and (
+                (self.max_entries is not None and
+                 len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self.size > self.max_bytes)):
+            self.size -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        """
+        Remove every entry from LRUCache self.
+
+        @type self: LRUCache
+        @rtype: None
+        """
+        self._entries.clear()
+        self.size = 0
+
+
+class TranspositionTable(LRUCache):
+    """
+    An LRUCache from the states of puzzles to their extensions, which
+    solvers consult so that each state is expanded at most once while it
+    stays in the table, across as many solves as share the table.
+
+    Entries are keyed by the exact_key of a puzzle, along with its type
+    and goal_state, as state keys only tell apart puzzles with the same
+    goal; so one table can serve solves towards different goals.  Puzzles
+    of one type with different rules, such as word ladders over different
+    word lists, must still not share a table.
+    """
+
+    @staticmethod
+    def goal(puzzle):
+        """
+        Return the type and goal of puzzle, which together with its
+        exact_key identify the extensions of puzzle.
+
+        @type puzzle: Puzzle
+        @rtype: (type, str | None)
+        """
+        goal = puzzle.goal_state()
+        return type(puzzle), None if goal is None else str(goal)
+
+    def extensions(self, puzzle, expand=None, goal=None):
+        """
+        Return the extensions of puzzle, from TranspositionTable self if
+        they are there, or else from expand(puzzle), storing them.
+
+        @type self: TranspositionTable
+        @type puzzle: Puzzle
+        @type expand: (Puzzle)->list[Puzzle] | None
+            how to generate extensions; Puzzle.extensions when None
+        @type goal: (type, str | None) | None
+            TranspositionTable.goal(puzzle), worked out when None; a
+            search passes that of the puzzle it started from
+        @rtype: list[Puzzle]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> table = TranspositionTable(max_entries=100)
+        >>> sol = breadth_first_solve(
+        ...     WordLadderPuzzle("on", "no", {"on", "oo", "no"}), cache=table)
+        >>> table.misses, len(table)
+        (2, 2)
+        >>> sol = depth_first_solve(
+        ...     WordLadderPuzzle("on", "no", {"on", "oo", "no"}), cache=table)
+        >>> table.hits
+        2
+        >>> ws = {"on", "oo", "no", "nn"}
+        >>> sol = breadth_first_solve(WordLadderPuzzle("on", "no", ws),
+        ...                           cache=table)
+        >>> sol = breadth_first_solve(WordLadderPuzzle("on", "oo", ws),
+        ...                           cache=table)
+        >>> while sol.children:
+        ...     sol = sol.children[0]
+        >>> sol.puzzle
+        oo -> oo
+        """
+        # the goal tells apart states with the same key working towards
+        # different targets
+        key = (TranspositionTable.goal(puzzle) if goal is None else goal,
+               puzzle.exact_key())
+        moves = self.get(key)
+        if moves is None:
+            moves = puzzle.extensions() if expand is None else expand(puzzle)
+            self.put(key, moves,
+                     sys.getsizeof(key) + sys.getsizeof(moves) +
+                     sum([sys.getsizeof(move) for move in moves]))
+        return moves
+
+
+class DeadPositions:
+    """
+    States known to have no solution, kept in a file at path as a sorted
+    array of unsigned 64-bit little-endian integers so that later searches
+    need not prove them dead again.
+
+    Only state keys that are ints below 2 ** 64 are kept, such as the
+    pegs of a GridPegSolitairePuzzle.  A state counts as dead once every
+    extension of it has been tried, with those already seen counted as
+    dead; that only holds for puzzles whose moves can never lead back to a
+    state already on the path, such as peg solitaire, where each jump
+    removes a peg.  As with a TranspositionTable, a store must only be
+    shared between puzzles with the same rules.
+    """
+
+    def __init__(self, path):
+        """
+        Create a new DeadPositions self, loading the states already in
+        the file at path, if there is one.
+
+        @type self: DeadPositions
+        @type path: str
+        @rtype: None
+        """
+        self.path = path
+        self._saved = self._load()
+        # dead states found since loading, not yet in the file
+        self._found = set()
+
+    def _load(self):
+        # Return the sorted array of states in the file of DeadPositions
+        # self, or an empty one if there is no file.
+        #
+        # @type self: DeadPositions
+        # @rtype: array[int]
+        keys = array("Q")
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                keys.frombytes(f.read())
+            if sys.byteorder == "big":
+                keys.byteswap()
+        return keys
+
+    def __contains__(self, key):
+        """
+        Return whether key is the state key of a state known to be dead.
+
+        @type self: DeadPositions
+        @type key: object
+        @rtype: bool
+        """
+        if not isinstance(key, int):
+            return False
+        if key in self._found:
+            return True
+        i = bisect_left(self._saved, key)
+        return i < len(self._saved) and self._saved[i] == key
+
+    def __len__(self):
+        """
+        Return the number of states known to be dead.
+
+        @type self: DeadPositions
+        @rtype: int
+        """
+        return len(self._saved) + len(self._found)
+
+    def add(self, key):
+        """
+        Record that the state with state key key is dead, if it can be
+        kept.
+
+        @type self: DeadPositions
+        @type key: object
+        @rtype: None
+        """
+        if isinstance(key, int) and 0 <= key < 1 << 64:
+            self._found.add(key)
+
+    def save(self):
+        """
+        Add the dead states found since DeadPositions self was loaded to
+        its file, along with any another process has saved there since.
+
+        @type self: DeadPositions
+        @rtype: None
+
+        >>> import os, tempfile
+        >>> from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+        >>> path = os.path.join(tempfile.mkdtemp(), "dead")
+        >>> grid = [["*", "*", ".", "*", "*", "."]]
+        >>> depth_first_solve(GridPegSolitairePuzzle(grid, {"*", "."}),
+        ...                   dead=DeadPositions(path)) is None
+        True
+        >>> len(DeadPositions(path)) > 0
+        True
+        """
+        if not self._found:
+            return
+        keys = array("Q", sorted(set(self._load()) | self._found))
+        self._saved, self._found = keys, set()
+        if sys.byteorder == "big":
+            keys = array("Q", keys)
+            keys.byteswap()
+        # write a whole new file, so readers never see half of one
+        partial = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(partial, "wb") as f:
+            keys.tofile(f)
+        os.replace(partial, self.path)
+
+
+class SearchStats:
+    """
+    Measurements of the work done by searches, filled in by the solvers
+    in this module when they are given one.
+
+    nodes_expanded - number of puzzles whose extensions were generated
+    nodes_generated - number of extensions generated
+    duplicates - extensions dropped because their state was already seen
+    peak_frontier - largest number of puzzles waiting to be expanded
+    peak_seen - largest number of state keys recorded at once
+    extensions_time - seconds spent in extensions or reverse_extensions
+    is_solved_time - seconds spent in is_solved
+    fail_fast_time - seconds spent in fail_fast
+    wall_time - seconds spent in the solvers
+    """
+
+    def __init__(self, progress=None, every=1000):
+        """
+        Create a new SearchStats self with every measurement at zero.
+
+        @type self: SearchStats
+        @type progress: (SearchStats)->Any | None
+            called with self after every `every` expansions
+        @type every: int
+        @rtype: None
+        """
+        self.nodes_expanded, self.nodes_generated, self.duplicates = 0, 0, 0
+        self.peak_frontier, self.peak_seen = 0, 0
+        self.extensions_time, self.is_solved_time = 0.0, 0.0
+        self.fail_fast_time, self.wall_time = 0.0, 0.0
+        self._progress, self._every = progress, every
+        self._started = None
+
+    def __repr__(self):
+        """
+        Return a string representation of SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+
+        >>> SearchStats()
+        SearchStats(nodes_expanded=0, nodes_generated=0, duplicates=0, \
+peak_frontier=0, peak_seen=0, extensions_time=0.0, is_solved_time=0.0, \
+fail_fast_time=0.0, wall_time=0.0)
+        """
+        return ("SearchStats(nodes_expanded={}, nodes_generated={}, "
+                "duplicates={}, peak_frontier={}, peak_seen={}, "
+                "extensions_time={}, is_solved_time={}, fail_fast_time={}, "
+                "wall_time={})".format(
+                    self.nodes_expanded, self.nodes_generated,
+                    self.duplicates, self.peak_frontier, self.peak_seen,
+                    self.extensions_time, self.is_solved_time,
+                    self.fail_fast_time, self.wall_time))
+
+    def start(self):
+        """
+        Record that a solver has started running.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self._started = perf_counter()
+
+    def stop(self):
+        """
+        Add the time since start was called to the wall time, if it has
+        not been added already.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        if self._started is not None:
+            self.wall_time += perf_counter() - self._started
+            self._started = None
+
+    def extensions(self, puzzle):
+        """
+        Return puzzle.extensions(), counting and timing the expansion.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: list[Puzzle]
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> stats = SearchStats()
+        >>> moves = stats.extensions(WordLadderPuzzle("on", "no", {"oo"}))
+        >>> stats.nodes_expanded, stats.nodes_generated
+        (1, 1)
+        """
+        start = perf_counter()
+        moves = puzzle.extensions()
+        self.extensions_time += perf_counter() - start
+        self._expanded(1, len(moves))
+        return moves
+
+    def reverse_extensions(self, puzzle):
+        """
+        Return puzzle.reverse_extensions(), counting and timing the
+        expansion.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: list[Puzzle]
+        """
+        start = perf_counter()
+        moves = puzzle.reverse_extensions()
+        self.extensions_time += perf_counter() - start
+        self._expanded(1, len(moves))
+        return moves
+
+    def is_solved(self, puzzle):
+        """
+        Return puzzle.is_solved(), timing the call.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        solved = puzzle.is_solved()
+        self.is_solved_time += perf_counter() - start
+        return solved
+
+    def fail_fast(self, puzzle):
+        """
+        Return puzzle.fail_fast(), timing the call.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        failed = puzzle.fail_fast()
+        self.fail_fast_time += perf_counter() - start
+        return failed
+
+    def duplicate(self):
+        """
+        Record that an extension was dropped as already seen.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.duplicates += 1
+
+    def reached(self, frontier, seen):
+        """
+        Record the current number of puzzles waiting to be expanded and
+        of state keys recorded.
+
+        @type self: SearchStats
+        @type frontier: int
+        @type seen: int
+        @rtype: None
+        """
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if seen > self.peak_seen:
+            self.peak_seen = seen
+
+    def merge(self, other):
+        """
+        Add the counts and times measured by other, such as a worker
+        process, to SearchStats self.
+
+        @type self: SearchStats
+        @type other: SearchStats
+        @rtype: None
+        """
+        self.duplicates += other.duplicates
+        self.extensions_time += other.extensions_time
+        self.is_solved_time += other.is_solved_time
+        self.fail_fast_time += other.fail_fast_time
+        self._expanded(other.nodes_expanded, other.nodes_generated)
+
+    def _expanded(self, expanded, generated):
+        # Count expanded puzzles and generated extensions, reporting
+        # progress whenever another `every` expansions have been made.
+        #
+        # @type self: SearchStats
+        # @type expanded: int
+        # @type generated: int
+        before = self.nodes_expanded
+        self.nodes_expanded += expanded
+        self.nodes_generated += generated
+        if (self._progress is not None and
+                before // self._every != self.nodes_expanded // self._every):
+            self._progress(self)
+
+    def __getstate__(self):
+        # the progress callback stays behind when SearchStats self is
+        # sent between processes
+        state = self.__dict__.copy()
+        state["_progress"] = None
+        return state
+
+
+class _Uncounted(SearchStats):
+    """
+    Stand-in used by the solvers when no SearchStats is given, which
+    calls through to the puzzle without measuring anything.
+    """
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def extensions(self, puzzle):
+        return puzzle.extensions()
+
+    def reverse_extensions(self, puzzle):
+        return puzzle.reverse_extensions()
+
+    def is_solved(self, puzzle):
+        return puzzle.is_solved()
+
+    def fail_fast(self, puzzle):
+        return puzzle.fail_fast()
+
+    def duplicate(self):
+        pass
+
+    def reached(self, frontier, seen):
+        pass
+
+
+_UNCOUNTED = _Uncounted()
@@ -225,6 +225,27 @@ class SudokuPuzzle(Puzzle):
                 return True
             else:
                 return False
+
+    def state_key(self):
+        """
+        Return a hashable key identifying the configuration of
+        SudokuPuzzle self.
+
+        This is an overridden method from parent class Puzzle
+
+        @type self: SudokuPuzzle
+        @rtype: tuple[str]
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> grid += ["*", "D", "*", "*"]
+        >>> grid += ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.state_key()[:8]
+        ('A', 'B', 'C', 'D', 'D', 'C', 'B', 'A')
+        """
+        return tuple(self._symbols)
+
     # override fail_fast
     # Notice that it is not possible to complete a sudoku puzzle if there
     # is one open position that has no symbols available to put in it.  In
@@ -1,4 +1,513 @@
 from puzzle import Puzzle
+from puzzle_tools import LRUCache, chain
+from array import array
+from bisect import bisect_left
+import json
+import mmap
+import os
+import pickle
+import sys
+from sys import intern
+
+# the first bytes of a file written by WordDictionary.save
+_SNAPSHOT_MAGIC = b"WordDictionary snapshot 1\n"
+# the first bytes of a file written by build_word_graph
+_GRAPH_MAGIC = b"WordGraph 1\n"
+# the WordDictionary loaded from each file, by real path, so each is read
+# once per process
+_LOADED = {}
+# the WordGraph mapped from each file, by real path
+_GRAPHS = {}
+# the ladder trees of source words asked about recently, by word list and
+# source word
+_TREES = LRUCache(max_bytes=64 * 2 ** 20)
+# the WordDictionary made for each collection of words used recently, by
+# the frozenset of its words
+_WRAPPED = LRUCache(max_entries=16)
+
+
+def _buckets(word):
+    """
+    Return the patterns word matches with one character made a wildcard.
+
+    @type word: str
+    @rtype: list[str]
+
+    >>> _buckets("same")
+    ['*ame', 's*me', 'sa*e', 'sam*']
+    """
+    return [word[:i] + "*" + word[i + 1:] for i in range(len(word))]
+
+
+def _components(words, neighbours):
+    """
+    Return a dict from each of words to a representative of its connected
+    component, the words reachable from it by steps through words, found
+    by union-find over the words and their neighbours.
+
+    @type words: iterable[Hashable]
+    @type neighbours: (Hashable)->iterable[Hashable]
+    @rtype: dict[Hashable, Hashable]
+
+    >>> steps = {1: [2], 2: [1], 3: []}
+    >>> components = _components([1, 2, 3], steps.get)
+    >>> components[1] == components[2], components[1] == components[3]
+    (True, False)
+    """
+    parent = {word: word for word in words}
+
+    def find(word):
+        # halve the path to the root on the way up
+        while parent[word] != word:
+            parent[word] = parent[parent[word]]
+            word = parent[word]
+        return word
+
+    for word in parent:
+        for other in neighbours(word):
+            root, other_root = find(word), find(other)
+            if root != other_root:
+                parent[other_root] = root
+    return {word: find(word) for word in parent}
+
+
+class WordDictionary:
+    """
+    The words a WordLadderPuzzle may step through, interned and kept by
+    length, with an index from each pattern with one wildcard to the
+    words matching it built the first time words of that length are
+    stepped from.  Two words are a step apart exactly when they share a
+    pattern.
+
+    A WordDictionary never changes once made.  Dictionaries are equal when
+    they hold the same words; puzzles sharing one compare it by identity
+    and only look at the words of different ones.
+    """
+
+    def __init__(self, words, path=None):
+        """
+        Create a new WordDictionary self of words, loaded from the file at
+        path, if any.
+
+        @type self: WordDictionary
+        @type words: iterable[str]
+        @type path: str | None
+        @rtype: None
+
+        >>> d = WordDictionary(["same", "some", "on", "same"])
+        >>> len(d), "some" in d, "so" in d
+        (3, True, False)
+        """
+        self.path = path
+        self._lengths = {}
+        for word in words:
+            self._lengths.setdefault(len(word), set()).add(intern(word))
+        self._indexes = {}
+        # the hash of the words, worked out when first needed
+        self._hash = None
+        # length -> the components of words of that length, as _components
+        self._components = {}
+
+    @staticmethod
+    def load(path):
+        """
+        Return the WordDictionary of the words in the file at path, either
+        whitespace-separated text or a snapshot written by
+        WordDictionary.save.  A file is only read the first time it is
+        loaded in a process.
+
+        @type path: str
+        @rtype: WordDictionary
+        """
+        key = os.path.realpath(path)
+        if key not in _LOADED:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:len(_SNAPSHOT_MAGIC)] == _SNAPSHOT_MAGIC:
+                words = [word for group in
+                         pickle.loads(data[len(_SNAPSHOT_MAGIC):]).values()
+                         for word in group]
+            else:
+                words = data.decode("UTF-8").split()
+            _LOADED[key] = WordDictionary(words, path)
+        return _LOADED[key]
+
+    def save(self, path):
+        """
+        Write the words of WordDictionary self to a snapshot at path, which
+        WordDictionary.load reads without parsing text.
+
+        @type self: WordDictionary
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "wb") as f:
+            f.write(_SNAPSHOT_MAGIC)
+            pickle.dump({length: sorted(words)
+                         for length, words in self._lengths.items()},
+                        f, pickle.HIGHEST_PROTOCOL)
+
+    def __reduce__(self):
+        # Return how to pickle WordDictionary self: by path when it was
+        # loaded from a file, so a worker process loads it once rather than
+        # receiving every word with each puzzle.
+        #
+        # @type self: WordDictionary
+        # @rtype: tuple
+        if self.path is not None:
+            return WordDictionary.load, (self.path,)
+        return WordDictionary, (list(self),)
+
+    def __eq__(self, other):
+        """
+        Return whether WordDictionary self holds the same words as other.
+
+        @type self: WordDictionary
+        @type other: WordDictionary | object
+        @rtype: bool
+
+        >>> WordDictionary(["on", "no"]) == WordDictionary(["no", "on"])
+        True
+        >>> WordDictionary(["on", "no"]) == WordDictionary(["on"])
+        False
+        """
+        return self is other or (type(self) == type(other) and
+                                 self._lengths == other._lengths)
+
+    def __hash__(self):
+        """
+        Return a hash of the words of WordDictionary self.
+
+        @type self: WordDictionary
+        @rtype: int
+        """
+        if self._hash is None:
+            self._hash = hash(frozenset(self))
+        return self._hash
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordDictionary self.
+
+        @type self: WordDictionary
+        @type word: str
+        @rtype: bool
+        """
+        return word in self._lengths.get(len(word), ())
+
+    def __len__(self):
+        """
+        Return the number of words in WordDictionary self.
+
+        @type self: WordDictionary
+        @rtype: int
+        """
+        return sum([len(words) for words in self._lengths.values()])
+
+    def __iter__(self):
+        """
+        Return an iterator over the words of WordDictionary self, shortest
+        first.
+
+        @type self: WordDictionary
+        @rtype: iterator[str]
+
+        >>> list(WordDictionary(["some", "on", "same"]))
+        ['on', 'same', 'some']
+        """
+        return iter([word for length in sorted(self._lengths)
+                     for word in sorted(self._lengths[length])])
+
+    def neighbours(self, word):
+        """
+        Return the words of WordDictionary self that differ from word in
+        exactly one character.
+
+        @type self: WordDictionary
+        @type word: str
+        @rtype: list[str]
+
+        >>> WordDictionary(["same", "some", "sane", "seem"]).neighbours("same")
+        ['some', 'sane']
+        """
+        index = self._indexes.get(len(word))
+        if index is None:
+            index = self._indexes[len(word)] = {}
+            for other in sorted(self._lengths.get(len(word), ())):
+                for pattern in _buckets(other):
+                    index.setdefault(pattern, []).append(other)
+        return [other for pattern in _buckets(word)
+                for other in index.get(pattern, []) if other != word]
+
+    def component(self, word):
+        """
+        Return a label of the words of WordDictionary self reachable from
+        word by steps through self, the same for every word reachable,
+        or None if word is not in self.  Labels of a length are found
+        together the first time one is asked for.
+
+        @type self: WordDictionary
+        @type word: str
+        @rtype: str | None
+
+        >>> d = WordDictionary(["same", "sane", "cane", "cost"])
+        >>> d.component("same") == d.component("cane")
+        True
+        >>> d.component("same") == d.component("cost")
+        False
+        """
+        components = self._components.get(len(word))
+        if components is None:
+            components = self._components[len(word)] = _components(
+                sorted(self._lengths.get(len(word), ())), self.neighbours)
+        return components.get(word)
+
+
+def build_word_graph(ws, path):
+    """
+    Write to path the graph of words in ws a step apart, for WordGraph to
+    map into memory: words are numbered in sorted order, and the ids of
+    the neighbours of word i are entries offsets[i] to offsets[i + 1] of
+    one array, as in a compressed sparse row matrix.
+
+    @type ws: WordDictionary | set[str]
+    @type path: str
+    @rtype: None
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "words.graph")
+    >>> build_word_graph({"same", "some", "sane", "seem"}, path)
+    >>> graph = WordGraph(path)
+    >>> list(graph), graph.neighbours("same")
+    (['same', 'sane', 'seem', 'some'], ['sane', 'some'])
+    """
+    words = _dictionary(ws)
+    ordered = sorted(words)
+    ids = {word: i for i, word in enumerate(ordered)}
+    text = "".join(ordered).encode("UTF-8")
+    # starts[i] is where word i begins in text
+    starts, offsets, neighbours = array("I", [0]), array("I", [0]), array("I")
+    for word in ordered:
+        starts.append(starts[-1] + len(word.encode("UTF-8")))
+        neighbours.extend(sorted([ids[other]
+                                  for other in words.neighbours(word)]))
+        offsets.append(len(neighbours))
+    header = json.dumps({"words": len(ordered), "edges": len(neighbours),
+                         "byteorder": sys.byteorder}).encode()
+    # pad the header so the arrays after it are aligned
+    header += b" " * (-(len(_GRAPH_MAGIC) + len(header) + 1) % 4)
+    with open(path, "wb") as f:
+        f.write(_GRAPH_MAGIC + header + b"\n")
+        for part in (starts, offsets, neighbours):
+            f.write(part.tobytes())
+        f.write(text)
+
+
+class WordGraph:
+    """
+    A graph of words written by build_word_graph, mapped into memory
+    rather than read, so it is ready at once and processes using the same
+    file share its pages.  It can stand in for a WordDictionary: a word is
+    looked up by binary search over the sorted words, and its neighbours
+    are a slice of the mapped neighbour ids.
+    """
+
+    def __init__(self, path):
+        """
+        Create a new WordGraph self from the file at path.
+
+        @type self: WordGraph
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(_GRAPH_MAGIC)] != _GRAPH_MAGIC:
+            raise ValueError("{} is not a word graph".format(path))
+        end = mapped.find(b"\n", len(_GRAPH_MAGIC))
+        header = json.loads(mapped[len(_GRAPH_MAGIC):end].decode())
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("{} was built with {}-endian arrays".format(
+                path, header["byteorder"]))
+        self.path = path
+        n, edges = header["words"], header["edges"]
+        view = memoryview(mapped)[end + 1:]
+        self.starts = view[:4 * (n + 1)].cast("I")
+        self.offsets = view[4 * (n + 1):8 * (n + 1)].cast("I")
+        self.neighbour_ids = view[8 * (n + 1):8 * (n + 1) + 4 * edges].cast(
+            "I")
+        self._text = view[8 * (n + 1) + 4 * edges:]
+        # the words decoded so far by id, and their ids by word, so each
+        # word is only decoded and searched for once
+        self._words, self._ids = {}, {}
+        # the characters the words are made of, found when first needed
+        self._alphabet = None
+        # the components of ids, as _components, found when first needed
+        self._components = None
+
+    @staticmethod
+    def load(path):
+        """
+        Return the WordGraph of the file at path, mapping it only the
+        first time it is loaded in a process.
+
+        @type path: str
+        @rtype: WordGraph
+        """
+        key = os.path.realpath(path)
+        if key not in _GRAPHS:
+            _GRAPHS[key] = WordGraph(path)
+        return _GRAPHS[key]
+
+    def __reduce__(self):
+        # Return how to pickle WordGraph self: by path, so a worker process
+        # maps the file once.
+        #
+        # @type self: WordGraph
+        # @rtype: tuple
+        return WordGraph.load, (self.path,)
+
+    def __len__(self):
+        """
+        Return the number of words in WordGraph self.
+
+        @type self: WordGraph
+        @rtype: int
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """
+        Return the word with id i in WordGraph self.
+
+        @type self: WordGraph
+        @type i: int
+        @rtype: str
+        """
+        word = self._words.get(i)
+        if word is None:
+            if not 0 <= i < len(self):
+                raise IndexError("no word with id {}".format(i))
+            word = intern(bytes(self._text[self.starts[i]:self.starts[i + 1]])
+                          .decode("UTF-8"))
+            self._words[i], self._ids[word] = word, i
+        return word
+
+    def __iter__(self):
+        """
+        Return an iterator over the words of WordGraph self, in order of
+        id.
+
+        @type self: WordGraph
+        @rtype: iterator[str]
+        """
+        return iter([self[i] for i in range(len(self))])
+
+    def id(self, word):
+        """
+        Return the id of word in WordGraph self, or -1 if it is not there.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: int
+        """
+        i = self._ids.get(word)
+        if i is not None:
+            return i
+        # ids follow sorted order, so self is a sorted sequence of words
+        i = bisect_left(self, word)
+        return i if i < len(self) and self[i] == word else -1
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordGraph self.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: bool
+        """
+        return self.id(word) != -1
+
+    def neighbours(self, word):
+        """
+        Return the words of WordGraph self that differ from word in exactly
+        one character.  For a word in self they are a slice of the graph;
+        for any other word, each way of changing one of its characters to
+        one used in self is looked up.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: list[str]
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "words.graph")
+        >>> build_word_graph({"same", "some", "sane", "seem"}, path)
+        >>> WordGraph(path).neighbours("xame")
+        ['same']
+        """
+        i = self._ids.get(word)
+        if i is None:
+            i = self.id(word)
+            if i == -1:
+                if self._alphabet is None:
+                    self._alphabet = sorted(set(bytes(self._text).decode(
+                        "UTF-8")))
+                return [other for other in
+                        [word[:k] + ch + word[k + 1:]
+                         for k in range(len(word))
+                         for ch in self._alphabet if ch != word[k]]
+                        if self.id(other) != -1]
+        words = self._words
+        return [words[j] if j in words else self[j] for j in
+                self.neighbour_ids[self.offsets[i]:self.offsets[i + 1]]]
+
+    def component(self, word):
+        """
+        Return a label of the words of WordGraph self reachable from word
+        by steps through self, the same for every word reachable, or None
+        if word is not in self.  Labels are found together the first time
+        one is asked for.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: int | None
+        """
+        if self._components is None:
+            offsets, ids = self.offsets, self.neighbour_ids
+            self._components = _components(
+                range(len(self)), lambda i: ids[offsets[i]:offsets[i + 1]])
+        i = self.id(word)
+        return None if i == -1 else self._components[i]
+
+
+def _dictionary(ws):
+    """
+    Return ws if it is a WordDictionary or WordGraph, or else the
+    WordDictionary of the words in ws, shared by every WordLadderPuzzle
+    given the same words.
+
+    @type ws: WordDictionary | WordGraph | set[str] | list[str]
+    @rtype: WordDictionary | WordGraph
+
+    >>> ws = {"same", "some"}
+    >>> words = _dictionary(ws)
+    >>> words is _dictionary(["some", "same"])
+    True
+    >>> ws.remove("some")
+    >>> ws.add("sane")
+    >>> _dictionary(ws).neighbours("same")
+    ['sane']
+    """
+    if isinstance(ws, (WordDictionary, WordGraph)):
+        return ws
+    # keyed by the words themselves, so changing ws in place can't hand
+    # back the WordDictionary of its old words
+    key = frozenset(ws)
+    words = _WRAPPED.get(key)
+    if words is None:
+        words = WordDictionary(key)
+        _WRAPPED.put(key, words)
+    return words
 
 
 class WordLadderPuzzle(Puzzle):
@@ -10,15 +519,16 @@ class WordLadderPuzzle(Puzzle):
         """
         Create a new word-ladder puzzle with the aim of stepping
         from from_word to to_word using words in ws, changing one
-        character at each step.
+        character at each step.  A set or list ws is wrapped in a
+        WordDictionary shared by every puzzle given the same words.
 
         @type from_word: str
         @type to_word: str
-        @type ws: set[str]
+        @type ws: WordDictionary | WordGraph | set[str] | list[str]
         @rtype: None
         """
-        (self._from_word, self._to_word, self._word_set) = (from_word,
-                                                            to_word, ws)
+        (self._from_word, self._to_word, self._word_set) = (
+            intern(from_word), intern(to_word), _dictionary(ws))
         # set of characters to use for 1-character changes
         self._chars = "abcdefghijklmnopqrstuvwxyz"
 
@@ -56,11 +566,16 @@ class WordLadderPuzzle(Puzzle):
         True
         >>> m == w
         False
+        >>> others = [WordLadderPuzzle("same", "cost", {str(i)})
+        ...           for i in range(20)]
+        >>> w == WordLadderPuzzle("same", "cost", set(word_set))
+        True
         """
         return (type(self) == type(other) and
                 self._from_word == other._from_word and
                 self._to_word == other._to_word and
-                self._word_set == other._word_set)
+                (self._word_set is other._word_set or
+                 self._word_set == other._word_set))
 
     def __repr__(self):
         """
@@ -100,27 +615,94 @@ class WordLadderPuzzle(Puzzle):
         >>> l3.sort() == w3.extensions().sort()
         True
         """
-        temp = []
-        final = []
-
         if self._from_word == self._to_word:
-            return final
-
-        for word in self._word_set:
-            count = 0
-            if len(word) == len(self._from_word):
-                for ch, char in zip(self._from_word, word):
-                    if ch != char:
-                        count += 1
-            else:
-                continue
+            return []
+        return [WordLadderPuzzle(word, self._to_word, self._word_set)
+                for word in self._neighbours()]
+
+    def reverse_extensions(self):
+        """
+        Return list of the WordLadderPuzzles that have WordLadderPuzzle self
+        among their extensions: those at an unsolved word one character
+        away, provided from_word is in the word set.
+
+        This is an overridden method of parent class Puzzle
+
+        @param WordLadderPuzzle self: this WordLadderPuzzle
+        @rtype: list[WordLadderPuzzle]
 
-            if count == 1:
-                temp.append(word)
+        >>> word_set = {'cost', 'cast', 'most', 'mist'}
+        >>> w = WordLadderPuzzle("cost", "cast", word_set)
+        >>> sorted([str(p) for p in w.reverse_extensions()])
+        ['most -> cast']
+        >>> WordLadderPuzzle("mast", "cast", word_set).reverse_extensions()
+        []
+        """
+        if self._from_word not in self._word_set:
+            return []
+        return [WordLadderPuzzle(word, self._to_word, self._word_set)
+                for word in self._neighbours() if word != self._to_word]
 
-        for word in temp:
-            final.append(WordLadderPuzzle(word, self._to_word, self._word_set))
-        return final
+    def goal_state(self):
+        """
+        Return the solved WordLadderPuzzle that WordLadderPuzzle self is
+        working towards.
+
+        This is an overridden method of parent class Puzzle
+
+        @param WordLadderPuzzle self: this WordLadderPuzzle
+        @rtype: WordLadderPuzzle
+
+        >>> w = WordLadderPuzzle("same", "cost", {'cast', 'cave', 'save'})
+        >>> w.goal_state()
+        cost -> cost
+        """
+        return WordLadderPuzzle(self._to_word, self._to_word, self._word_set)
+
+    def _neighbours(self):
+        # Return list of the words in the word set of WordLadderPuzzle self
+        # that differ from from_word in exactly one character.
+        #
+        # @param WordLadderPuzzle self: this WordLadderPuzzle
+        # @rtype: list[str]
+        return self._word_set.neighbours(self._from_word)
+
+    def fail_fast(self):
+        """
+        Return True if WordLadderPuzzle self can never be extended to a
+        solution: to_word is not in the word list, has a different length
+        from from_word, or lies in a different component of the word
+        list from every word one step from from_word.
+
+        This is an overridden method of parent class Puzzle
+
+        @param WordLadderPuzzle self: this WordLadderPuzzle
+        @rtype: bool
+
+        >>> word_set = {'same', 'sane', 'cane', 'cost'}
+        >>> WordLadderPuzzle("same", "cane", word_set).fail_fast()
+        False
+        >>> WordLadderPuzzle("same", "cost", word_set).fail_fast()
+        True
+        >>> WordLadderPuzzle("sale", "cane", word_set).fail_fast()
+        False
+        >>> WordLadderPuzzle("cost", "cost", word_set).fail_fast()
+        False
+        """
+        if self._from_word == self._to_word:
+            return False
+        if len(self._from_word) != len(self._to_word):
+            return True
+        words = self._word_set
+        goal = words.component(self._to_word)
+        if goal is None:
+            return True
+        if self._from_word in words:
+            return words.component(self._from_word) != goal
+        # from_word itself is outside the word list, but its neighbours
+        # aren't
+        return all([words.component(word) != goal
+                    for word in self._neighbours()])
 
     def is_solved(self):
         """
@@ -130,13 +712,129 @@ class WordLadderPuzzle(Puzzle):
         """
         return self._from_word == self._to_word
 
+    def heuristic(self):
+        """
+        Return the number of positions at which from_word differs from
+        to_word.  Each move changes one character, so this never
+        overestimates the number of moves left.
+
+        This is an overridden method from parent class Puzzle
+
+        @param WordLadderPuzzle self: this WordLadderPuzzle
+        @rtype: int
+
+        >>> w = WordLadderPuzzle("same", "cost", {'cast', 'cave', 'save'})
+        >>> w.heuristic()
+        4
+        """
+        return (sum([a != b for a, b in zip(self._from_word, self._to_word)])
+                + abs(len(self._from_word) - len(self._to_word)))
+
+    def state_key(self):
+        """
+        Return a hashable key identifying the configuration of
+        WordLadderPuzzle self.
+
+        This is an overridden method from parent class Puzzle
+
+        @param WordLadderPuzzle self: this WordLadderPuzzle
+        @rtype: str
+
+        >>> w = WordLadderPuzzle("same", "cost", {'cast', 'cave', 'save'})
+        >>> w.state_key()
+        'same'
+        """
+        # to_word and the word set never change during a search
+        return self._from_word
+
+
+def ladder_tree(from_word, ws, cache=None):
+    """
+    Return a dict from each word reachable from from_word through words in
+    ws to the word before it on a shortest ladder from from_word, or None
+    for from_word itself, found by one breadth-first search.
+
+    @type from_word: str
+    @type ws: WordDictionary | WordGraph | set[str]
+    @type cache: LRUCache | None
+        ladder trees kept between calls, by word list and source word; a
+        module-wide cache of at most 64 MiB when None
+    @rtype: dict[str, str | None]
+
+    >>> tree = ladder_tree("same", {"same", "some", "sane", "sone", "cost"})
+    >>> sorted(tree.items(), key=str)
+    [('same', None), ('sane', 'same'), ('some', 'same'), ('sone', 'some')]
+    """
+    words = _dictionary(ws)
+    cache = _TREES if cache is None else cache
+    key = (words, from_word)
+    tree = cache.get(key)
+    if tree is None:
+        tree = {intern(from_word): None}
+        layer = [from_word]
+        while layer:
+            next_layer = []
+            for word in layer:
+                for other in words.neighbours(word):
+                    if other not in tree:
+                        tree[other] = word
+                        next_layer.append(other)
+            layer = next_layer
+        # the words themselves are shared with the word list
+        cache.put(key, tree, sys.getsizeof(tree))
+    return tree
+
+
+def ladders(from_word, to_words, ws, cache=None):
+    """
+    Return a dict from each word in to_words to a shortest path from
+    PuzzleNode(WordLadderPuzzle(from_word, to_word, ws)) to a solution, in
+    the form breadth_first_solve returns, or None if there is none.
+
+    Every path is read off one ladder tree from from_word, shared with
+    later queries from the same word through cache, rather than searching
+    again for each to_word.
+
+    @type from_word: str
+    @type to_words: iterable[str]
+    @type ws: WordDictionary | WordGraph | set[str]
+    @type cache: LRUCache | None
+        ladder trees kept between calls, as for ladder_tree
+    @rtype: dict[str, PuzzleNode | None]
+
+    >>> ws = {"same", "some", "sane", "sone", "cost"}
+    >>> paths = ladders("same", ["sone", "cost"], ws)
+    >>> print(paths["sone"])
+    same -> sone
+    <BLANKLINE>
+    some -> sone
+    <BLANKLINE>
+    sone -> sone
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> paths["cost"] is None
+    True
+    """
+    words = _dictionary(ws)
+    tree = ladder_tree(from_word, words, cache)
+    paths = {}
+    for to_word in to_words:
+        if to_word not in tree:
+            paths[to_word] = None
+            continue
+        ladder, word = [], to_word
+        while word is not None:
+            ladder.append(WordLadderPuzzle(word, to_word, words))
+            word = tree[word]
+        paths[to_word] = chain(ladder[::-1])
+    return paths
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
     from puzzle_tools import breadth_first_solve, depth_first_solve
     from time import time
-    with open("words", "r", encoding='UTF-8') as words:
-        word_set = set(words.read().split())
+    word_set = WordDictionary.load("words")
     w = WordLadderPuzzle("same", "cost", word_set)
     start = time()
     sol = breadth_first_solve(w)